@@ -1,8 +1,517 @@
-from googletrans import Translator
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-# create an instance of the translator
-translator = Translator()
+# Where the translation memory is kept between runs
+TRANSLATION_MEMORY_PATH = os.environ.get(
+    "TRANSLATION_MEMORY", os.path.join(os.path.expanduser("~"), ".translation_memory.sqlite3"))
 
-translation = translator.translate("Hello, world!", dest="spanish")
-# print the translated text
-print(translation.text)
+# Define the interface every translation backend implements; a backend call
+# translates a list of strings and may not exceed max_chars or max_items
+class TranslatorBackend:
+    max_chars = 5000
+    max_items = 100
+    # Strings are packed into one call joined by this separator; strings that
+    # contain it are sent on their own
+    separator = "\n"
+
+    def translate_batch(self, texts, src, dest):
+        raise NotImplementedError
+
+# Define a backend on top of googletrans, packing a batch into a single request
+class GoogletransBackend(TranslatorBackend):
+    def __init__(self):
+        self.local = threading.local()
+
+    # googletrans clients are not shared between worker threads
+    @property
+    def translator(self):
+        if not hasattr(self.local, "translator"):
+            from googletrans import Translator
+            self.local.translator = Translator()
+        return self.local.translator
+
+    def translate_batch(self, texts, src, dest):
+        if len(texts) > 1:
+            translation = self.translator.translate(self.separator.join(texts), src=src, dest=dest)
+            lines = translation.text.split(self.separator)
+            if len(lines) == len(texts):
+                return lines
+            # The service merged or split lines; fall back to one call per string
+        return [self.translator.translate(text, src=src, dest=dest).text for text in texts]
+
+# Define a backend for a LibreTranslate server, which accepts a list of strings per request
+class LibreTranslateBackend(TranslatorBackend):
+    separator = None
+
+    def __init__(self, url="http://localhost:5000/translate", api_key=None):
+        from http_client import HttpClient
+        self.url = url
+        self.api_key = api_key
+        self.client = HttpClient()
+
+    def translate_batch(self, texts, src, dest):
+        payload = {"q": texts, "source": src, "target": dest, "format": "text"}
+        if self.api_key:
+            payload["api_key"] = self.api_key
+        response = self.client.post(self.url, json=payload)
+        response.raise_for_status()
+        return response.json()["translatedText"]
+
+# Define a local stand-in backend for tests: tags each string with the target
+# language and counts how many calls it received
+class FakeBackend(TranslatorBackend):
+    def __init__(self, max_chars=5000, max_items=100):
+        self.max_chars = max_chars
+        self.max_items = max_items
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def translate_batch(self, texts, src, dest):
+        with self.lock:
+            self.calls += 1
+        return ["[%s] %s" % (dest, text) for text in texts]
+
+# Define a persistent (source text, source lang, dest lang) -> translation store
+# on SQLite, with an in-process LRU in front of it
+class TranslationMemory:
+    QUERY_CHUNK = 500
+
+    def __init__(self, path=TRANSLATION_MEMORY_PATH, lru_size=100000):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS memory (source TEXT, src TEXT, dest TEXT, translation TEXT,"
+            " PRIMARY KEY (source, src, dest)) WITHOUT ROWID")
+        self.lru = OrderedDict()
+        self.lru_size = lru_size
+
+    def _remember(self, key, translation):
+        self.lru[key] = translation
+        self.lru.move_to_end(key)
+        if len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+
+    # Return a {text: translation} dict for every text that is already known
+    def get_many(self, texts, src, dest):
+        found = {}
+        missing = []
+        for text in texts:
+            key = (text, src, dest)
+            if key in self.lru:
+                self.lru.move_to_end(key)
+                found[text] = self.lru[key]
+            else:
+                missing.append(text)
+        for start in range(0, len(missing), self.QUERY_CHUNK):
+            chunk = missing[start:start + self.QUERY_CHUNK]
+            rows = self.conn.execute(
+                "SELECT source, translation FROM memory WHERE src = ? AND dest = ? AND source IN (%s)"
+                % ",".join("?" * len(chunk)), [src, dest] + chunk)
+            for text, translation in rows:
+                found[text] = translation
+                self._remember((text, src, dest), translation)
+        return found
+
+    def put_many(self, pairs, src, dest):
+        pairs = list(pairs)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO memory (source, src, dest, translation) VALUES (?, ?, ?, ?)",
+            [(text, src, dest, translation) for text, translation in pairs])
+        self.conn.commit()
+        for text, translation in pairs:
+            self._remember((text, src, dest), translation)
+
+    def close(self):
+        self.conn.close()
+
+# Language names and aliases accepted for src/dest, normalised to the codes the backends use
+LANGUAGE_CODES = {
+    "english": "en", "spanish": "es", "castilian": "es", "french": "fr", "german": "de",
+    "italian": "it", "portuguese": "pt", "dutch": "nl", "russian": "ru", "polish": "pl",
+    "swedish": "sv", "danish": "da", "norwegian": "no", "finnish": "fi", "turkish": "tr",
+    "greek": "el", "czech": "cs", "ukrainian": "uk", "arabic": "ar", "hebrew": "iw",
+    "hindi": "hi", "bengali": "bn", "japanese": "ja", "korean": "ko", "chinese": "zh-cn",
+    "chinese (simplified)": "zh-cn", "chinese (traditional)": "zh-tw", "zh": "zh-cn",
+    "vietnamese": "vi", "thai": "th", "indonesian": "id", "malay": "ms", "romanian": "ro",
+    "hungarian": "hu",
+}
+
+# Define a function to normalise a language name, code or locale ("Spanish", "es_ES") to a code
+def normalize_language(language):
+    language = language.strip().lower().replace("_", "-")
+    if language in LANGUAGE_CODES:
+        return LANGUAGE_CODES[language]
+    if language in LANGUAGE_CODES.values() or language == "auto":
+        return language
+    base = language.split("-")[0]
+    return LANGUAGE_CODES.get(base, base)
+
+# Placeholders that must come back from the backend untouched: {name}, {0},
+# {{name}}, ${name}, %s, %(name)s, %1$s and simple HTML tags
+PLACEHOLDER_RE = re.compile(
+    r"\{\{[^{}]*\}\}|\$?\{[^{}\s]*\}|%(?:\(\w+\)|\d+\$)?[-+#0]*\d*(?:\.\d+)?[sdifeEgGxXocr%]|</?\w+[^<>]*>")
+PLACEHOLDER_TOKEN_RE = re.compile(r"__\s*PH\s*(\d+)\s*__", re.IGNORECASE)
+# Content that is never translated: placeholders, URLs, e-mail addresses and numbers
+UNTRANSLATABLE_RE = re.compile(
+    PLACEHOLDER_RE.pattern + r"|\b(?:https?://|www\.)\S+|\S+@\S+\.\w+|[-+]?\d[\d.,:/]*")
+LETTER_RE = re.compile(r"[^\W\d_]")
+WORD_RE = re.compile(r"[^\W\d_]+")
+
+# Define a function to swap placeholders for numbered tokens; returns (text, placeholders)
+def protect_placeholders(text):
+    placeholders = []
+
+    def replace(match):
+        placeholders.append(match.group())
+        return "__PH%d__" % (len(placeholders) - 1)
+    return PLACEHOLDER_RE.sub(replace, text), placeholders
+
+# Put the placeholders back; returns None if the backend lost or duplicated one
+def restore_placeholders(text, placeholders):
+    found = [int(index) for index in PLACEHOLDER_TOKEN_RE.findall(text)]
+    if sorted(found) != list(range(len(placeholders))):
+        return None
+    return PLACEHOLDER_TOKEN_RE.sub(lambda match: placeholders[int(match.group(1))], text)
+
+# Small samples of running text used to build the character trigram profiles
+LANGUAGE_SAMPLES = {
+    "en": "the quick brown fox jumps over the lazy dog. this is the file that you have to open and "
+          "save before you close the window. would you like to share your changes with other people? "
+          "there was an error while loading the settings, please try again later. thank you for "
+          "waiting, your account has been updated and everything should work now.",
+    "es": "el rápido zorro marrón salta sobre el perro perezoso. este es el archivo que tienes que "
+          "abrir y guardar antes de cerrar la ventana. quieres compartir tus cambios con otras "
+          "personas? hubo un error al cargar la configuración, por favor inténtalo de nuevo más "
+          "tarde. gracias por esperar, tu cuenta ha sido actualizada y todo debería funcionar ahora.",
+    "fr": "le rapide renard brun saute par dessus le chien paresseux. voici le fichier que vous devez "
+          "ouvrir et enregistrer avant de fermer la fenêtre. voulez vous partager vos modifications "
+          "avec d'autres personnes? une erreur s'est produite lors du chargement des paramètres, "
+          "veuillez réessayer plus tard. merci de votre patience, votre compte a été mis à jour.",
+    "de": "der schnelle braune fuchs springt über den faulen hund. das ist die datei, die du öffnen "
+          "und speichern musst, bevor du das fenster schließt. möchtest du deine änderungen mit "
+          "anderen personen teilen? beim laden der einstellungen ist ein fehler aufgetreten, bitte "
+          "versuche es später erneut. danke für deine geduld, dein konto wurde aktualisiert.",
+    "it": "la veloce volpe marrone salta sopra il cane pigro. questo è il file che devi aprire e "
+          "salvare prima di chiudere la finestra. vuoi condividere le tue modifiche con altre "
+          "persone? si è verificato un errore durante il caricamento delle impostazioni, per favore "
+          "riprova più tardi. grazie per l'attesa, il tuo account è stato aggiornato.",
+    "pt": "a rápida raposa marrom pula sobre o cão preguiçoso. este é o arquivo que você precisa "
+          "abrir e salvar antes de fechar a janela. você gostaria de compartilhar suas alterações "
+          "com outras pessoas? ocorreu um erro ao carregar as configurações, por favor tente "
+          "novamente mais tarde. obrigado por esperar, sua conta foi atualizada.",
+    "nl": "de snelle bruine vos springt over de luie hond. dit is het bestand dat je moet openen en "
+          "opslaan voordat je het venster sluit. wil je je wijzigingen delen met andere mensen? er "
+          "is een fout opgetreden bij het laden van de instellingen, probeer het later opnieuw. "
+          "bedankt voor het wachten, je account is bijgewerkt en alles zou nu moeten werken.",
+}
+# Scripts that identify a language on their own, checked before the trigram profiles
+SCRIPT_LANGUAGES = [
+    (re.compile(r"[぀-ヿ]"), "ja"),
+    (re.compile(r"[가-힯]"), "ko"),
+    (re.compile(r"[฀-๿]"), "th"),
+    (re.compile(r"[Ͱ-Ͽ]"), "el"),
+]
+# Scripts shared by many languages (Han, Cyrillic, Arabic, Hebrew, Devanagari)
+# for which there are no profiles; such text is always left to the backend
+SHARED_SCRIPTS_RE = re.compile(r"[一-鿿Ѐ-ӿ؀-ۿ֐-׿ऀ-ॿ]")
+PROFILE_SIZE = 300
+# A trigram match must be close in absolute terms and clearly ahead of the
+# runner-up; both are fractions of the largest possible distance. Languages
+# without a profile (Catalan, Galician, Danish...) land near a relative
+# profile but fail one of these.
+MAX_DISTANCE = 0.6
+MIN_MARGIN = 0.1
+_profiles = {}
+
+def trigram_ranks(text, limit=PROFILE_SIZE):
+    text = " " + " ".join(WORD_RE.findall(text.lower())) + " "
+    counts = {}
+    for i in range(len(text) - 2):
+        trigram = text[i:i + 3]
+        counts[trigram] = counts.get(trigram, 0) + 1
+    ranked = sorted(counts, key=lambda trigram: (-counts[trigram], trigram))[:limit]
+    return {trigram: rank for rank, trigram in enumerate(ranked)}
+
+# Define a lightweight offline language detector (Cavnar-Trenkle "out of place"
+# distance over character trigrams); returns a code or None when unsure
+def detect_language(text, min_letters=12):
+    for pattern, language in SCRIPT_LANGUAGES:
+        if pattern.search(text):
+            return language
+    if SHARED_SCRIPTS_RE.search(text):
+        return None
+    if len(LETTER_RE.findall(text)) < min_letters:
+        return None
+    if not _profiles:
+        _profiles.update((language, trigram_ranks(sample)) for language, sample in LANGUAGE_SAMPLES.items())
+    ranks = trigram_ranks(text)
+    scores = sorted(
+        (sum(abs(rank - profile.get(trigram, PROFILE_SIZE)) for trigram, rank in ranks.items()), language)
+        for language, profile in _profiles.items())
+    # Require a close and clear winner; anything else is left to the backend
+    worst = len(ranks) * PROFILE_SIZE
+    best, runner_up = scores[0], scores[1]
+    if best[0] > worst * MAX_DISTANCE or runner_up[0] - best[0] < worst * MIN_MARGIN:
+        return None
+    return best[1]
+
+# Define a function that decides, without any remote call, whether a string needs translating
+def needs_translation(text, src, dest):
+    content = UNTRANSLATABLE_RE.sub(" ", text)
+    if not LETTER_RE.search(content):
+        return False
+    if src != "auto":
+        return src != dest
+    return detect_language(content) != dest
+
+# Define a function that groups strings, in order, into batches that respect
+# the backend's size limits; returns a list of lists of strings
+def pack_batches(texts, backend):
+    batches = []
+    batch, size = [], 0
+    for text in texts:
+        joined = len(text) + (1 if batch else 0)
+        alone = backend.separator is not None and backend.separator in text
+        if batch and (alone or size + joined > backend.max_chars or len(batch) >= backend.max_items):
+            batches.append(batch)
+            batch, size = [], 0
+            joined = len(text)
+        batch.append(text)
+        size += joined
+        if alone:
+            batches.append(batch)
+            batch, size = [], 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+# Define the batch API: translate many strings with as few backend calls as
+# possible, running batches concurrently and keeping the input order. Strings
+# that need no translation or are in the translation memory never reach the
+# backend, and placeholders are protected on the way through.
+def translate_many(texts, dest, src="auto", backend=None, workers=4, memory=None):
+    backend = backend or GoogletransBackend()
+    src, dest = normalize_language(src), normalize_language(dest)
+    # Every distinct string is translated only once
+    unique = list(dict.fromkeys(texts))
+    translated = {text: text for text in unique if not needs_translation(text, src, dest)}
+    pending = [text for text in unique if text not in translated]
+    if memory is not None:
+        translated.update(memory.get_many(pending, src, dest))
+    # Strings that only differ in their placeholders share one backend slot
+    by_masked = {}
+    for text in pending:
+        if text not in translated:
+            masked, placeholders = protect_placeholders(text)
+            by_masked.setdefault(masked, []).append((text, placeholders))
+    batches = pack_batches(list(by_masked), backend)
+    with ThreadPoolExecutor(workers) as pool:
+        results = pool.map(lambda batch: backend.translate_batch(batch, src, dest), batches)
+        for batch, result in zip(batches, results):
+            fresh = []
+            for masked, translation in zip(batch, result):
+                for text, placeholders in by_masked[masked]:
+                    restored = restore_placeholders(translation, placeholders)
+                    if restored is None:
+                        # A placeholder was mangled; keeping the source is safer than a broken string
+                        translated[text] = text
+                    else:
+                        fresh.append((text, restored))
+            translated.update(fresh)
+            # Store each batch as it arrives so an interrupted run keeps its progress
+            if memory is not None:
+                memory.put_many(fresh, src, dest)
+    return [translated[text] for text in texts]
+
+# Sentence boundaries used to cut long lines into segments; the whitespace
+# after the punctuation is kept and never sent to the backend
+SENTENCE_RE = re.compile(r"(?<=[.!?])(\s+)")
+
+# Define a function to split text into sentence segments; returns the parts
+# (sentences and the whitespace between them) and the indexes worth translating
+def split_sentences(text):
+    parts = SENTENCE_RE.split(text)
+    return parts, [i for i in range(0, len(parts), 2) if parts[i].strip()]
+
+def join_sentences(parts, slots, translations):
+    parts = list(parts)
+    for i, translation in zip(slots, translations):
+        parts[i] = translation
+    return "".join(parts)
+
+# Each reader below yields units of (input offset after the unit, segments,
+# render) where render(translations) returns the output text for the unit
+
+def read_lines(f, offset):
+    for raw in f:
+        offset += len(raw)
+        yield offset, raw.decode("utf-8")
+
+def text_units(f, offset, fields):
+    for end, line in read_lines(f, offset):
+        body = line.rstrip("\r\n")
+        parts, slots = split_sentences(body)
+
+        def render(translations, parts=parts, slots=slots, newline=line[len(body):]):
+            return join_sentences(parts, slots, translations) + newline
+        yield end, [parts[i] for i in slots], render
+
+def jsonl_units(f, offset, fields):
+    for end, line in read_lines(f, offset):
+        if not line.strip():
+            yield end, [], lambda translations, line=line: line
+            continue
+        record = json.loads(line)
+        pieces = [(field,) + split_sentences(record[field]) for field in fields
+                  if isinstance(record.get(field), str)]
+        segments = [parts[i] for field, parts, slots in pieces for i in slots]
+
+        def render(translations, record=record, pieces=pieces):
+            translations = iter(translations)
+            for field, parts, slots in pieces:
+                record[field] = join_sentences(parts, slots, [next(translations) for _ in slots])
+            return json.dumps(record, ensure_ascii=False) + "\n"
+        yield end, segments, render
+
+def po_unquote(line):
+    value = line[line.index('"') + 1:line.rindex('"')]
+    return re.sub(r'\\(.)', lambda m: {"n": "\n", "t": "\t"}.get(m.group(1), m.group(1)), value)
+
+def po_quote(text):
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\t", "\\t") + '"'
+
+def po_entry(lines):
+    # Fill in an empty msgstr with the translation of the msgid
+    msgid, msgstr, kept, field = [], [], [], None
+    for line in lines:
+        if line.startswith("msgid "):
+            field = msgid
+        elif line.startswith("msgstr "):
+            field = msgstr
+        elif not line.startswith('"'):
+            field = None
+        if field is not None:
+            field.append(po_unquote(line))
+        if field is not msgstr:
+            kept.append(line)
+    text = "".join(msgid)
+    if not text or "".join(msgstr) or any(line.startswith("msgid_plural") for line in lines):
+        # Header, already translated or plural entries are copied unchanged
+        return [], lambda translations: "".join(lines)
+    return [text], lambda translations: "".join(kept) + "msgstr " + po_quote(translations[0]) + "\n"
+
+def po_units(f, offset, fields):
+    block = []
+    for end, line in read_lines(f, offset):
+        if line.strip():
+            block.append(line)
+            continue
+        if block:
+            segments, render = po_entry(block)
+            block = []
+            yield end - len(line.encode("utf-8")), segments, render
+        yield end, [], lambda translations, line=line: line
+    if block:
+        segments, render = po_entry(block)
+        yield end, segments, render
+
+UNIT_READERS = {"txt": text_units, "jsonl": jsonl_units, "po": po_units}
+
+# Define the streaming file translator: units are read lazily, translated a
+# window at a time and written in order; after every window the output is
+# fsynced and a checkpoint records how far both files got, so a rerun resumes
+def translate_file(input_path, output_path, dest, src="auto", file_format=None, fields=("text",),
+                   backend=None, memory=None, workers=4, window=2000, report=print):
+    file_format = file_format or os.path.splitext(input_path)[1].lstrip(".").lower()
+    if file_format not in UNIT_READERS:
+        file_format = "txt"
+    checkpoint_path = output_path + ".checkpoint"
+    state = {"input_offset": 0, "output_offset": 0, "segments": 0, "chars": 0}
+    if os.path.exists(checkpoint_path) and os.path.exists(output_path):
+        with open(checkpoint_path) as f:
+            state = json.load(f)
+        report("Resuming at byte %d of %s" % (state["input_offset"], input_path))
+    backend = backend or GoogletransBackend()
+    start = time.perf_counter()
+    done_segments = done_chars = 0
+
+    with open(input_path, "rb") as source, open(output_path, "ab") as out:
+        source.seek(state["input_offset"])
+        out.truncate(state["output_offset"])
+        units = UNIT_READERS[file_format](source, state["input_offset"], fields)
+        while True:
+            pending = []
+            count = 0
+            for unit in units:
+                pending.append(unit)
+                count += len(unit[1])
+                if count >= window:
+                    break
+            if not pending:
+                break
+            segments = [segment for unit in pending for segment in unit[1]]
+            translations = iter(translate_many(segments, dest, src, backend, workers, memory))
+            for end, unit_segments, render in pending:
+                out.write(render([next(translations) for _ in unit_segments]).encode("utf-8"))
+            out.flush()
+            os.fsync(out.fileno())
+            done_segments += len(segments)
+            done_chars += sum(map(len, segments))
+            state = {"input_offset": pending[-1][0], "output_offset": out.tell(),
+                     "segments": state["segments"] + len(segments),
+                     "chars": state["chars"] + sum(map(len, segments))}
+            with open(checkpoint_path + ".tmp", "w") as f:
+                json.dump(state, f)
+            os.replace(checkpoint_path + ".tmp", checkpoint_path)
+            elapsed = max(time.perf_counter() - start, 1e-9)
+            report("%d segments, %.1f segments/s, %.0f chars/s"
+                   % (state["segments"], done_segments / elapsed, done_chars / elapsed))
+    # No checkpoint is written when there was nothing to translate
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return state
+
+def make_backend(name):
+    if name == "fake":
+        return FakeBackend()
+    if name == "libretranslate":
+        return LibreTranslateBackend(os.environ.get("LIBRETRANSLATE_URL", "http://localhost:5000/translate"),
+                                     os.environ.get("LIBRETRANSLATE_API_KEY"))
+    return GoogletransBackend()
+
+def main():
+    parser = argparse.ArgumentParser(description="Translate a text, JSONL or .po file as a stream.")
+    parser.add_argument("input", nargs="?", help="file to translate (without it a short demo runs)")
+    parser.add_argument("output", nargs="?", help="where to write the translation")
+    parser.add_argument("--dest", default="spanish", help="target language")
+    parser.add_argument("--src", default="auto", help="source language")
+    parser.add_argument("--format", choices=sorted(UNIT_READERS), help="input format (default: from extension)")
+    parser.add_argument("--field", action="append", help="JSONL field to translate (default: text)")
+    parser.add_argument("--backend", choices=["googletrans", "libretranslate", "fake"], default="googletrans")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent backend calls")
+    parser.add_argument("--window", type=int, default=2000, help="segments per checkpoint")
+    parser.add_argument("--no-memory", action="store_true", help="do not use the translation memory")
+    args = parser.parse_args()
+
+    memory = None if args.no_memory else TranslationMemory()
+    if not args.input:
+        translation = translate_many(["Hello, world!"], dest=args.dest, memory=memory)[0]
+        # print the translated text
+        print(translation)
+        return
+    if not args.output:
+        parser.error("an output file is required")
+    translate_file(args.input, args.output, args.dest, args.src, args.format, args.field or ["text"],
+                   make_backend(args.backend), memory, args.workers, args.window,
+                   report=lambda message: print(message, file=sys.stderr))
+
+if __name__ == "__main__":
+    main()
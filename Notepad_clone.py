@@ -1,6 +1,811 @@
 # Importing the required modules
+import difflib
+import json
+import mmap
+import os
+import queue
+import random
+import re
+import threading
+import uuid
+import zlib
 import tkinter as tk
-from tkinter import filedialog
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from tkinter import filedialog, messagebox, simpledialog, ttk
+
+# Token patterns used by the syntax highlighter (Python and INI-style config files)
+KEYWORDS = (
+    "False None True and as assert async await break class continue def del elif else except "
+    "finally for from global if import in is lambda nonlocal not or pass raise return try while "
+    "with yield true false null yes no on off"
+).split()
+TOKEN_RE = re.compile(
+    r"(?P<section>^\s*\[[^\]]*\])"
+    r"|(?P<comment>#.*)"
+    r"|(?P<triple>'''|\"\"\")"
+    r"|(?P<string>\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*')"
+    r"|(?P<number>\b\d+(?:\.\d+)?\b)"
+    r"|(?P<keyword>\b(?:" + "|".join(KEYWORDS) + r")\b)"
+)
+TAG_COLORS = {
+    "section": "#795e26",
+    "comment": "#808080",
+    "string": "#2e7d32",
+    "number": "#b45309",
+    "keyword": "#1d4ed8",
+}
+# Lexer states carried from one line to the next: 0 is normal code, otherwise
+# the line starts inside an unterminated triple-quoted string
+TRIPLE_QUOTES = {1: "'''", 2: '"""'}
+TRIPLE_STATES = {"'''": 1, '"""': 2}
+
+
+# Split a single line into (tag, start column, end column) tokens and return
+# them together with the lexer state at the end of the line
+def lex_line(text, state):
+    tokens = []
+    pos = 0
+    if state:
+        end = text.find(TRIPLE_QUOTES[state])
+        if end < 0:
+            return [("string", 0, len(text))], state
+        pos = end + 3
+        tokens.append(("string", 0, pos))
+        state = 0
+    while True:
+        match = TOKEN_RE.search(text, pos)
+        if not match:
+            break
+        kind = match.lastgroup
+        start, pos = match.span()
+        if kind == "triple":
+            end = text.find(match.group(), pos)
+            if end < 0:
+                tokens.append(("string", start, len(text)))
+                return tokens, TRIPLE_STATES[match.group()]
+            pos = end + 3
+            kind = "string"
+        tokens.append((kind, start, pos))
+    return tokens, state
+
+
+# Define a class that sits between Tcl and the Text widget so that every
+# insert/delete (including undo/redo) is reported with resolved positions
+class TextProxy:
+    def __init__(self, widget):
+        self.widget = widget
+        self.listeners = []
+        self._orig = widget._w + "_orig"
+        widget.tk.call("rename", widget._w, self._orig)
+        widget.tk.createcommand(widget._w, self._dispatch)
+
+    # Resolve an index to "line.col", clamping "end" to the last real character
+    def _index(self, index):
+        call = self.widget.tk.call
+        index = call(self._orig, "index", index)
+        if index == call(self._orig, "index", "end"):
+            index = call(self._orig, "index", "end-1c")
+        return index
+
+    def _dispatch(self, command, *args):
+        # A Python exception here would be re-raised from mainloop() and end the
+        # editor, even when Tk's own bindings wrap the call in catch (e.g.
+        # "delete sel.first sel.last" with no selection), so Tcl errors become ""
+        try:
+            event = None
+            if command == "insert" and len(args) >= 2:
+                event = ("insert", self._index(args[0]), "".join(args[1::2]))
+            elif command == "delete" and 1 <= len(args) <= 2:
+                start = self._index(args[0])
+                end = self._index(args[1] if len(args) == 2 else start + "+1c")
+                if self.widget.tk.call(self._orig, "compare", start, "<", end):
+                    event = ("delete", start, end)
+            elif command in ("delete", "replace"):
+                event = ("reset",)
+            result = self.widget.tk.call((self._orig, command) + args)
+        except tk.TclError:
+            return ""
+        if event:
+            for listener in self.listeners:
+                listener(*event)
+        return result
+
+
+# Define a highlighter that keeps the lexer state at the start of every line it
+# has seen, re-lexes only the lines an edit can affect and tags only what is visible
+class IncrementalHighlighter:
+    BATCH = 256
+
+    def __init__(self, text):
+        self.text = text
+        self.enabled = True
+        # states[i] is the lexer state at the start of line i + 1; the list only
+        # covers the prefix of the document that has been lexed so far
+        self.states = [0]
+        self._pending = None
+        for tag, color in TAG_COLORS.items():
+            text.tag_configure(tag, foreground=color)
+        text.bind("<Configure>", lambda event: self.schedule(), add="+")
+
+    # Forget every cached state, e.g. after loading a new document
+    def reset(self):
+        self.states = [0]
+        self.schedule()
+
+    # Called by the TextProxy after each edit
+    def on_edit(self, kind, start=None, end=None):
+        if kind == "insert":
+            first = int(start.split(".")[0])
+            self.edit(first, 1, 1 + end.count("\n"))
+        elif kind == "delete":
+            first = int(start.split(".")[0])
+            self.edit(first, int(end.split(".")[0]) - first + 1, 1)
+        else:
+            self.states = [0]
+        self.schedule()
+
+    # Lines first..first+old_count-1 were replaced by new_count lines
+    def edit(self, first, old_count, new_count):
+        states = self.states
+        if first > len(states):
+            return
+        tail = states[first + old_count:]
+        if not tail:
+            # Nothing past the edit was lexed yet, so there is nothing to repair
+            del states[first:]
+            return
+        states[first:] = [None] * new_count + tail
+        self._relex(first, first + new_count)
+
+    # Re-lex from `line` onwards until the state at the start of an untouched
+    # line (index >= stop) comes out unchanged; everything after it is still valid
+    def _relex(self, line, stop):
+        states = self.states
+        while line < len(states):
+            batch = self.text.get(f"{line}.0", f"{line + self.BATCH - 1}.end").split("\n")
+            for line_text in batch:
+                state = lex_line(line_text, states[line - 1])[1]
+                if line >= stop and states[line] == state:
+                    return
+                states[line] = state
+                line += 1
+                if line >= len(states):
+                    return
+
+    # Make sure the start state of `line` is known, lexing forward lazily
+    def ensure(self, line):
+        states = self.states
+        start = len(states)
+        if start >= line:
+            return
+        state = states[-1]
+        for line_text in self.text.get(f"{start}.0", f"{line - 1}.end").split("\n"):
+            state = lex_line(line_text, state)[1]
+            states.append(state)
+
+    def on_scroll(self, first, last):
+        self.schedule()
+
+    # Coalesce bursts of edits and scroll events into a single repaint
+    def schedule(self):
+        if self.enabled and self._pending is None:
+            self._pending = self.text.after_idle(self.refresh)
+
+    # Re-apply tags to the lines currently on screen
+    def refresh(self):
+        self._pending = None
+        text = self.text
+        first = int(text.index("@0,0").split(".")[0])
+        last = int(text.index(f"@0,{text.winfo_height()}").split(".")[0])
+        self.ensure(last)
+        self.clear(f"{first}.0", f"{last}.end")
+        lines = text.get(f"{first}.0", f"{last}.end").split("\n")
+        for number, line_text in enumerate(lines, first):
+            for tag, start, end in lex_line(line_text, self.states[number - 1])[0]:
+                text.tag_add(tag, f"{number}.{start}", f"{number}.{end}")
+
+    def clear(self, start="1.0", end=tk.END):
+        for tag in TAG_COLORS:
+            self.text.tag_remove(tag, start, end)
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if enabled:
+            self.schedule()
+        else:
+            self.clear()
+
+
+# Folder holding the append-only edit journals of unsaved documents
+JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".ideapad", "journal")
+
+
+# Define an append-only journal of insert/delete operations so unsaved edits
+# survive a crash without re-writing the whole buffer on every autosave
+class EditJournal:
+    FLUSH_MS = 2000
+    COMPACT_OPS = 5000
+
+    def __init__(self, textarea, filename=None):
+        self.textarea = textarea
+        os.makedirs(JOURNAL_DIR, exist_ok=True)
+        self.path = os.path.join(JOURNAL_DIR, uuid.uuid4().hex + ".journal")
+        self.paused = False
+        self.pending = []
+        self.ops = 0
+        self._file = None
+        self._timer = None
+        self.start(filename)
+
+    # Begin a fresh journal whose base is the file as it is on disk now
+    def start(self, filename):
+        self.filename = filename
+        self.pending = []
+        self.ops = 0
+        self.dirty = False
+        self._write_file([self._base_record()])
+
+    def _base_record(self):
+        # The pid tells other IdeaPad windows this journal is still in use
+        record = {"op": "base", "file": self.filename, "pid": os.getpid()}
+        if self.filename and os.path.exists(self.filename):
+            stat = os.stat(self.filename)
+            record.update(mtime=stat.st_mtime, size=stat.st_size)
+        return json.dumps(record)
+
+    # Atomically replace the journal file with the given records
+    def _write_file(self, records):
+        if self._file:
+            self._file.close()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(records) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    # Called by the TextProxy after each edit
+    def record(self, kind, start=None, end=None):
+        if self.paused or self._file is None:
+            return
+        if kind == "insert":
+            self.pending.append(json.dumps({"op": "i", "at": start, "text": end}))
+        elif kind == "delete":
+            self.pending.append(json.dumps({"op": "d", "from": start, "to": end}))
+        else:
+            # The edit could not be described as a position, so snapshot instead
+            self.dirty = True
+            self.compact()
+            return
+        self.ops += 1
+        self.dirty = True
+
+    # Called on <<Modified>>; arms the flush timer only while edits are arriving
+    def on_modified(self, event=None):
+        if not self.textarea.edit_modified():
+            return
+        self.textarea.edit_modified(False)
+        if self._timer is None:
+            self._timer = self.textarea.after(self.FLUSH_MS, self.flush)
+
+    # Append the pending operations and fsync them
+    def flush(self):
+        self._timer = None
+        if self._file is None:
+            return
+        if self.ops >= self.COMPACT_OPS:
+            self.compact()
+            return
+        if self.pending:
+            self._file.write("\n".join(self.pending) + "\n")
+            self.pending = []
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    # Write out pending records and stop the timer while the tab is inactive
+    def suspend(self):
+        if self._timer is not None:
+            self.textarea.after_cancel(self._timer)
+        self.flush()
+
+    # Replace the operation log with a single snapshot of the buffer
+    def compact(self):
+        self.pending = []
+        self.ops = 0
+        snapshot = json.dumps({"op": "snapshot", "text": self.textarea.get("1.0", "end-1c")})
+        self._write_file([self._base_record(), snapshot])
+
+    # True when the journal holds edits that were never saved
+    def has_changes(self):
+        return self.dirty
+
+    # Remove the journal, e.g. after the document was saved and closed
+    def discard(self):
+        if self._timer is not None:
+            self.textarea.after_cancel(self._timer)
+            self._timer = None
+        if self._file:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# True when a process with this id is running; journals of running editors
+# are live and must not be offered for recovery or removed
+def process_alive(pid):
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        # PROCESS_QUERY_LIMITED_INFORMATION; STILL_ACTIVE is 259
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return code.value == 259
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Read a journal file, ignoring a torn last line left behind by a crash
+def read_journal(path):
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+    if not records or records[0].get("op") != "base":
+        return None
+    return records
+
+
+# Rebuild a document in `textarea` from the journal records
+def replay_journal(records, textarea):
+    base = records[0]
+    content = ""
+    if base.get("file") and os.path.exists(base["file"]):
+        with open(base["file"], "r", encoding="utf-8", errors="surrogateescape") as f:
+            content = f.read()
+    textarea.delete("1.0", tk.END)
+    textarea.insert(tk.END, content)
+    for record in records[1:]:
+        if record["op"] == "i":
+            textarea.insert(record["at"], record["text"])
+        elif record["op"] == "d":
+            textarea.delete(record["from"], record["to"])
+        elif record["op"] == "snapshot":
+            textarea.delete("1.0", tk.END)
+            textarea.insert(tk.END, record["text"])
+
+
+# Define one node of the piece tree: a slice of one of the two buffers plus
+# subtree totals, so offsets and line numbers are found in O(log n). Nodes are
+# never modified, so an old root stays a valid view of the text it had.
+class PieceNode:
+    __slots__ = ("left", "right", "prio", "buf", "start", "length", "nl", "size", "lines")
+
+    def __init__(self, buf, start, length, nl, prio, left=None, right=None):
+        self.buf, self.start, self.length, self.nl, self.prio = buf, start, length, nl, prio
+        self.left, self.right = left, right
+        self.size = length + (left.size if left else 0) + (right.size if right else 0)
+        self.lines = nl + (left.lines if left else 0) + (right.lines if right else 0)
+
+    def with_children(self, left, right):
+        return PieceNode(self.buf, self.start, self.length, self.nl, self.prio, left, right)
+
+
+# Define a piece table over a read-only (mmapped) original buffer and an
+# append-only add buffer; positions are UTF-8 byte offsets
+class PieceTable:
+    ORIGINAL, ADD = 0, 1
+
+    def __init__(self, original=b""):
+        self.buffers = [original, bytearray()]
+        self.newlines = [self._scan_newlines(original, 0), array("q")]
+        self.root = self._leaf(self.ORIGINAL, 0, len(original)) if len(original) else None
+
+    # Map a file into memory instead of reading it
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls()
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def from_text(cls, text):
+        return cls(text.encode("utf-8", "surrogateescape"))
+
+    @staticmethod
+    def _scan_newlines(data, base):
+        positions = array("q")
+        pos = data.find(b"\n")
+        while pos >= 0:
+            positions.append(base + pos)
+            pos = data.find(b"\n", pos + 1)
+        return positions
+
+    def _leaf(self, buf, start, length):
+        newlines = self.newlines[buf]
+        nl = bisect_left(newlines, start + length) - bisect_left(newlines, start)
+        return PieceNode(buf, start, length, nl, random.random())
+
+    @property
+    def size(self):
+        return self.root.size if self.root else 0
+
+    def line_count(self):
+        return (self.root.lines if self.root else 0) + 1
+
+    # Split a tree into the first `offset` bytes and the rest
+    def _split(self, node, offset):
+        if node is None:
+            return None, None
+        left_size = node.left.size if node.left else 0
+        if offset <= left_size:
+            left, right = self._split(node.left, offset)
+            return left, node.with_children(right, node.right)
+        offset -= left_size
+        if offset >= node.length:
+            left, right = self._split(node.right, offset - node.length)
+            return node.with_children(node.left, left), right
+        head = self._leaf(node.buf, node.start, offset)
+        head = PieceNode(head.buf, head.start, head.length, head.nl, node.prio, node.left)
+        tail = self._leaf(node.buf, node.start + offset, node.length - offset)
+        return head, self._merge(tail, node.right)
+
+    def _merge(self, left, right):
+        if left is None or right is None:
+            return left or right
+        if left.prio > right.prio:
+            return left.with_children(left.left, self._merge(left.right, right))
+        return right.with_children(self._merge(left, right.left), right.right)
+
+    def insert(self, offset, data):
+        if not data:
+            return
+        add = self.buffers[self.ADD]
+        start = len(add)
+        add.extend(data)
+        self.newlines[self.ADD].extend(self._scan_newlines(data, start))
+        left, right = self._split(self.root, offset)
+        self.root = self._merge(self._merge(left, self._leaf(self.ADD, start, len(data))), right)
+
+    def delete(self, start, end):
+        left, rest = self._split(self.root, start)
+        right = self._split(rest, end - start)[1]
+        self.root = self._merge(left, right)
+
+    # Byte offset of the first character of a 1-based line
+    def line_start(self, line):
+        if line <= 1:
+            return 0
+        k, node, base = line - 1, self.root, 0
+        while node is not None:
+            left_lines = node.left.lines if node.left else 0
+            left_size = node.left.size if node.left else 0
+            if k <= left_lines:
+                node = node.left
+                continue
+            k -= left_lines
+            if k <= node.nl:
+                newlines = self.newlines[node.buf]
+                pos = newlines[bisect_left(newlines, node.start) + k - 1]
+                return base + left_size + pos - node.start + 1
+            k -= node.nl
+            base += left_size + node.length
+            node = node.right
+        return self.size
+
+    # Translate a Tk "line.col" index (columns count characters) to a byte offset
+    def offset(self, index):
+        line, col = map(int, index.split("."))
+        start = self.line_start(line)
+        if col == 0:
+            return start
+        end = self.line_start(line + 1) if line < self.line_count() else self.size
+        text = self.read(start, end).decode("utf-8", "surrogateescape")
+        return start + len(text[:col].encode("utf-8", "surrogateescape"))
+
+    # Apply an edit reported by the TextProxy
+    def apply(self, kind, start, end):
+        if kind == "insert":
+            self.insert(self.offset(start), end.encode("utf-8", "surrogateescape"))
+        else:
+            a = self.offset(start)
+            self.delete(a, self.offset(end))
+
+    # Yield the bytes between two offsets piece by piece
+    def chunks(self, start=0, end=None, root=None):
+        root = self.root if root is None else root
+        if end is None:
+            end = root.size if root else 0
+        return self._walk(root, 0, start, end)
+
+    def _walk(self, node, base, a, b):
+        if node is None or a >= base + node.size or b <= base:
+            return
+        left_size = node.left.size if node.left else 0
+        yield from self._walk(node.left, base, a, b)
+        piece_base = base + left_size
+        lo, hi = max(a, piece_base), min(b, piece_base + node.length)
+        if lo < hi:
+            offset = node.start + lo - piece_base
+            yield bytes(self.buffers[node.buf][offset:offset + hi - lo])
+        yield from self._walk(node.right, piece_base + node.length, a, b)
+
+    def read(self, start, end):
+        return b"".join(self.chunks(start, end))
+
+    def text(self, root=None):
+        return b"".join(self.chunks(root=root)).decode("utf-8", "surrogateescape")
+
+    # Stream the pieces to `path` and return a fresh table over the saved file
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for chunk in self.chunks():
+                f.write(chunk)
+        # Unmap before replacing, since a mapped file cannot be replaced on Windows
+        self.close()
+        os.replace(tmp_path, path)
+        return PieceTable.open(path)
+
+    def close(self):
+        if isinstance(self.buffers[self.ORIGINAL], mmap.mmap):
+            self.buffers[self.ORIGINAL].close()
+        self.root = None
+
+
+# Folder where evicted background tabs with unsaved changes are spilled
+SPILL_DIR = os.path.join(os.path.expanduser("~"), ".ideapad", "spill")
+
+
+# Define a document shown in one tab; only the active one lives in the Text widget
+class Document:
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.journal = None
+        self.model = None
+        self.frame = None
+        self.blob = None
+        self.spill_path = None
+        self.cursor = "1.0"
+        self.yview = 0.0
+
+    # Move the compressed text out of memory into a spill file
+    def spill(self):
+        os.makedirs(SPILL_DIR, exist_ok=True)
+        if self.spill_path is None:
+            self.spill_path = os.path.join(SPILL_DIR, uuid.uuid4().hex + ".z")
+        with open(self.spill_path, "wb") as f:
+            f.write(self.blob)
+        self.blob = None
+
+    # Return the text of an inactive document from memory, the spill file or disk
+    def read_text(self):
+        if self.blob is not None:
+            return zlib.decompress(self.blob).decode("utf-8", "surrogateescape")
+        if self.spill_path is not None:
+            with open(self.spill_path, "rb") as f:
+                text = zlib.decompress(f.read()).decode("utf-8", "surrogateescape")
+            self.drop_spill()
+            return text
+        if self.filename:
+            with open(self.filename, "r", encoding="utf-8", errors="surrogateescape") as f:
+                return f.read()
+        return ""
+
+    def drop_spill(self):
+        if self.spill_path is not None:
+            if os.path.exists(self.spill_path):
+                os.remove(self.spill_path)
+            self.spill_path = None
+
+
+# Define an LRU of compressed background tabs bounded by a byte budget;
+# the least recently used ones are spilled to disk when it overflows
+class BufferCache:
+    def __init__(self, budget=32 * 1024 * 1024):
+        self.budget = budget
+        self.used = 0
+        self.entries = OrderedDict()
+
+    def store(self, document, text):
+        self.forget(document)
+        document.drop_spill()
+        document.blob = zlib.compress(text.encode("utf-8", "surrogateescape"), 1)
+        self.entries[document] = len(document.blob)
+        self.used += len(document.blob)
+        while self.used > self.budget and len(self.entries) > 1:
+            evicted, size = self.entries.popitem(last=False)
+            self.used -= size
+            evicted.spill()
+
+    # Take a document's text back out of the cache when its tab is activated
+    def take(self, document):
+        text = document.read_text()
+        self.forget(document)
+        document.blob = None
+        return text
+
+    def forget(self, document):
+        size = self.entries.pop(document, None)
+        if size is not None:
+            self.used -= size
+
+
+# Directories that are never worth searching
+SKIP_DIRS = {".git", ".hg", ".svn", "__pycache__", "node_modules", ".venv", "venv"}
+
+
+# Define a cancellable search across a directory tree; a pool of threads reads
+# files in large blocks and pushes (path, line, text) hits onto a queue
+class FolderSearch:
+    BLOCK_SIZE = 1024 * 1024
+    SNIFF_SIZE = 8192
+    MAX_LINE = 200
+
+    def __init__(self, folder, pattern, ignore_case=False, workers=8):
+        self.folder = folder
+        self.regex = re.compile(re.escape(pattern.encode("utf-8")), re.IGNORECASE if ignore_case else 0)
+        self.workers = workers
+        self.results = queue.Queue()
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def _paths(self):
+        for folder, dirs, files in os.walk(self.folder):
+            dirs[:] = [name for name in dirs if name not in SKIP_DIRS]
+            for name in files:
+                yield os.path.join(folder, name)
+
+    def _run(self):
+        with ThreadPoolExecutor(self.workers) as pool:
+            pending = set()
+            for path in self._paths():
+                if self.cancelled.is_set():
+                    break
+                pending.add(pool.submit(self._search_file, path))
+                # Keep the walk only a little ahead of the workers
+                if len(pending) >= self.workers * 4:
+                    pending = wait(pending, return_when=FIRST_COMPLETED)[1]
+        # None tells the results pane that the search is over
+        self.results.put(None)
+
+    def _search_file(self, path):
+        try:
+            with open(path, "rb") as f:
+                carry = f.read(self.SNIFF_SIZE)
+                if b"\0" in carry:
+                    return
+                line = 1
+                while not self.cancelled.is_set():
+                    block = f.read(self.BLOCK_SIZE)
+                    data = carry + block
+                    # Only scan whole lines; the partial last line waits for the next block
+                    cut = data.rfind(b"\n") + 1 if block else len(data)
+                    if block and cut == 0:
+                        carry = data
+                        continue
+                    line = self._scan(path, data[:cut], line)
+                    carry = data[cut:]
+                    if not block:
+                        return
+        except OSError:
+            return
+
+    # Report every matching line of a chunk and return the line number after it
+    def _scan(self, path, chunk, line):
+        pos = 0
+        last_line = None
+        for match in self.regex.finditer(chunk):
+            start = match.start()
+            line += chunk.count(b"\n", pos, start)
+            pos = start
+            if line == last_line:
+                continue
+            last_line = line
+            line_start = chunk.rfind(b"\n", 0, start) + 1
+            line_end = chunk.find(b"\n", start)
+            if line_end < 0:
+                line_end = len(chunk)
+            text = chunk[line_start:line_end][:self.MAX_LINE].decode("utf-8", "replace").strip()
+            self.results.put((path, line, text))
+        return line + chunk.count(b"\n", pos)
+
+
+# Define the pane that streams FolderSearch hits in as they arrive
+class SearchResults:
+    POLL_MS = 100
+    BATCH = 500
+
+    def __init__(self, notepad, search):
+        self.notepad = notepad
+        self.search = search
+        self.hits = []
+        self.window = tk.Toplevel(notepad.master)
+        self.window.title("Find in Folder - " + search.folder)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.status = tk.Label(self.window, text="Searching...", anchor="w")
+        self.status.pack(fill=tk.X)
+        self.cancel_button = tk.Button(self.window, text="Cancel", command=self.cancel)
+        self.cancel_button.pack(anchor="e")
+        scrollbar = tk.Scrollbar(self.window)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(self.window, width=100, height=25, yscrollcommand=scrollbar.set)
+        self.listbox.pack(fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.listbox.yview)
+        self.listbox.bind("<Double-Button-1>", self.open_hit)
+        self.listbox.bind("<Return>", self.open_hit)
+        self._timer = None
+        search.start()
+        self.poll()
+
+    # Move a bounded batch of hits from the queue into the list on each tick
+    def poll(self):
+        self._timer = None
+        rows = []
+        finished = False
+        for _ in range(self.BATCH):
+            try:
+                hit = self.search.results.get_nowait()
+            except queue.Empty:
+                break
+            if hit is None:
+                finished = True
+                break
+            self.hits.append(hit)
+            path, line, text = hit
+            rows.append("%s:%d: %s" % (os.path.relpath(path, self.search.folder), line, text))
+        if rows:
+            self.listbox.insert(tk.END, *rows)
+        if finished:
+            state = "Cancelled" if self.search.cancelled.is_set() else "Done"
+            self.status.config(text="%s - %d matches" % (state, len(self.hits)))
+            self.cancel_button.config(state=tk.DISABLED)
+        else:
+            self.status.config(text="Searching... %d matches" % len(self.hits))
+            self._timer = self.window.after(self.POLL_MS, self.poll)
+
+    def open_hit(self, event=None):
+        selection = self.listbox.curselection()
+        if selection:
+            path, line, text = self.hits[selection[0]]
+            self.notepad.open_at(path, line)
+
+    def cancel(self):
+        self.search.cancel()
+
+    def close(self):
+        self.search.cancel()
+        # A pending poll would otherwise run against the destroyed window
+        if self._timer is not None:
+            self.window.after_cancel(self._timer)
+            self._timer = None
+        self.window.destroy()
+
 
 # Defining the Notepad class
 class Notepad:
@@ -8,41 +813,263 @@ class Notepad:
     def __init__(self, master):
         self.master = master
         master.title("Untitled - IdeaPad")
+        # One tab bar over a single shared Text widget; inactive documents are
+        # unloaded from Tk and kept in the BufferCache or on disk
+        self.tabs = ttk.Notebook(master)
+        self.tabs.pack(fill=tk.X)
+        self.tabs.bind("<<NotebookTabChanged>>", self.on_tab_changed)
         self.textarea = tk.Text(master, undo=True)
         self.textarea.pack(fill=tk.BOTH, expand=True)
-        self.filename = None
+        self.documents = []
+        self.current = None
+        self.cache = BufferCache()
+
+        # Hook the textarea so edits drive the incremental syntax highlighter
+        self.proxy = TextProxy(self.textarea)
+        self.highlighter = IncrementalHighlighter(self.textarea)
+        self.proxy.listeners.append(self.highlighter.on_edit)
+        self.textarea.config(yscrollcommand=self.highlighter.on_scroll)
+        # The proxy answers a failed "get sel.first sel.last" with "", which Tk's
+        # copy and cut would put on the clipboard, so they need a selection
+        self.textarea.bind("<<Copy>>", self.require_selection)
+        self.textarea.bind("<<Cut>>", self.require_selection)
+
+        # Journal every edit so unsaved work can be recovered after a crash
+        self.proxy.listeners.append(self.on_edit)
+        self.textarea.bind("<<Modified>>", self.on_modified)
+        master.protocol("WM_DELETE_WINDOW", self.close)
         
         # Create a menu bar
         menubar = tk.Menu(master)
         master.config(menu=menubar)
         
-        # Create a "File" menu with "Open", "Save", and "Save As" options
+        # Create a "File" menu with "New Tab", "Open", "Save", "Save As" and "Close Tab" options
         file_menu = tk.Menu(menubar, tearoff=False)
+        file_menu.add_command(label="New Tab", command=self.new_tab)
         file_menu.add_command(label="Open", command=self.open_file)
         file_menu.add_command(label="Save", command=self.save_file)
         file_menu.add_command(label="Save As", command=self.save_file_as)
+        file_menu.add_command(label="Close Tab", command=self.close_tab)
         menubar.add_cascade(label="File", menu=file_menu)
+
+        # Create a "Search" menu with "Find in Folder"
+        search_menu = tk.Menu(menubar, tearoff=False)
+        search_menu.add_command(label="Find in Folder...", command=self.find_in_folder)
+        menubar.add_cascade(label="Search", menu=search_menu)
+
+        # Create a "View" menu to toggle syntax highlighting
+        self.highlight_var = tk.BooleanVar(value=True)
+        view_menu = tk.Menu(menubar, tearoff=False)
+        view_menu.add_checkbutton(label="Syntax Highlighting", variable=self.highlight_var,
+                                  command=lambda: self.highlighter.set_enabled(self.highlight_var.get()))
+        # Optionally mirror every edit into a piece table for streamed saves and diffs
+        self.model_var = tk.BooleanVar(value=False)
+        view_menu.add_checkbutton(label="Piece Table Model", variable=self.model_var, command=self.toggle_model)
+        view_menu.add_command(label="Diff Against Disk", command=self.show_diff)
+        menubar.add_cascade(label="View", menu=view_menu)
+
+        self.new_tab()
+
+    # The filename and journal always refer to the document in the active tab
+    @property
+    def filename(self):
+        return self.current.filename
+
+    @filename.setter
+    def filename(self, value):
+        self.current.filename = value
+        self.tabs.tab(self.current.frame, text=os.path.basename(value) if value else "Untitled")
+
+    @property
+    def journal(self):
+        if self.current.journal is None:
+            self.current.journal = EditJournal(self.textarea, self.current.filename)
+        return self.current.journal
+
+    def on_edit(self, *event):
+        if self.current is not None:
+            self.journal.record(*event)
+            if self.current.model is not None:
+                if event[0] == "reset":
+                    self.current.model = PieceTable.from_text(self.textarea.get("1.0", "end-1c"))
+                else:
+                    self.current.model.apply(*event)
+
+    def require_selection(self, event=None):
+        if not self.textarea.tag_ranges("sel"):
+            return "break"
+
+    def on_modified(self, event=None):
+        if self.current is not None:
+            self.journal.on_modified(event)
+
+    # Define a method to add a tab without loading anything into Tk yet
+    def add_document(self, filename=None):
+        document = Document(filename)
+        document.frame = tk.Frame(self.tabs, height=0)
+        self.documents.append(document)
+        self.tabs.add(document.frame, text=os.path.basename(filename) if filename else "Untitled")
+        return document
+
+    def new_tab(self):
+        self.switch_to(self.add_document())
+
+    # Define a method to make a document the one shown in the Text widget
+    def switch_to(self, document):
+        if document is self.current:
+            return
+        previous = self.current
+        if previous is not None:
+            # Unload the previous document: clean files are simply re-read from
+            # disk later, anything else is compressed into the LRU cache
+            previous.cursor = self.textarea.index(tk.INSERT)
+            previous.yview = self.textarea.yview()[0]
+            if previous.journal is not None:
+                previous.journal.suspend()
+            if previous.filename and not (previous.journal and previous.journal.has_changes()):
+                self.cache.forget(previous)
+            else:
+                self.cache.store(previous, self.textarea.get("1.0", "end-1c"))
+        # Only let go of the previous document once its text is safely stored
+        self.current = None
+        self.textarea.delete("1.0", tk.END)
+        self.textarea.insert(tk.END, self.cache.take(document))
+        self.textarea.edit_reset()
+        self.current = document
+        if self.model_var.get() and document.model is None:
+            self.build_model()
+        self.highlighter.reset()
+        self.textarea.mark_set(tk.INSERT, document.cursor)
+        self.textarea.yview_moveto(document.yview)
+        self.tabs.select(document.frame)
+        self.master.title((self.filename or "Untitled") + " - Notepad")
+
+    def on_tab_changed(self, event=None):
+        selected = self.tabs.select()
+        for document in self.documents:
+            if str(document.frame) == selected:
+                self.switch_to(document)
+                break
+
+    # Define a method to close the active tab
+    def close_tab(self):
+        if not self.confirm_discard():
+            return
+        document, self.current = self.current, None
+        if document.journal is not None:
+            document.journal.discard()
+        if document.model is not None:
+            document.model.close()
+        index = self.documents.index(document)
+        self.documents.remove(document)
+        if not self.documents:
+            self.add_document()
+        self.switch_to(self.documents[min(index, len(self.documents) - 1)])
+        self.tabs.forget(document.frame)
+        document.frame.destroy()
+
+    # Define a method to build the piece table for the active document, mapping
+    # the file itself when it matches the buffer byte for byte
+    def build_model(self):
+        text = self.textarea.get("1.0", "end-1c")
+        model = None
+        if self.filename and os.path.exists(self.filename) and not self.journal.has_changes():
+            model = PieceTable.open(self.filename)
+            if model.size != len(text.encode("utf-8", "surrogateescape")):
+                # Newline translation or a different encoding; fall back to a copy
+                model.close()
+                model = None
+        self.current.model = model or PieceTable.from_text(text)
+
+    def toggle_model(self):
+        if self.model_var.get():
+            self.build_model()
+        else:
+            for document in self.documents:
+                if document.model is not None:
+                    document.model.close()
+                    document.model = None
+
+    # Define a method to show the unsaved changes as a unified diff
+    def show_diff(self):
+        if not self.filename or not os.path.exists(self.filename):
+            messagebox.showinfo("Diff Against Disk", "This document has not been saved yet.")
+            return
+        with open(self.filename, "r", encoding="utf-8", errors="surrogateescape") as f:
+            disk = f.read().splitlines(True)
+        if self.current.model is not None:
+            buffer = self.current.model.text().splitlines(True)
+        else:
+            buffer = self.textarea.get("1.0", "end-1c").splitlines(True)
+        diff = "".join(difflib.unified_diff(disk, buffer, self.filename + " (disk)", self.filename + " (buffer)"))
+        window = tk.Toplevel(self.master)
+        window.title("Diff - " + self.filename)
+        view = tk.Text(window)
+        view.pack(fill=tk.BOTH, expand=True)
+        view.insert(tk.END, diff or "No differences.")
+        view.config(state=tk.DISABLED)
+
+    # Ask to save the active document; returns False if the user cancelled
+    def confirm_discard(self):
+        if self.current.journal is None or not self.journal.has_changes():
+            return True
+        label = self.filename or "Untitled"
+        answer = messagebox.askyesnocancel("IdeaPad", "Save changes to " + label + "?")
+        if answer is None:
+            return False
+        if answer:
+            self.save_file()
+            return not self.journal.has_changes()
+        return True
     
-    # Define a method to open a file
+    # Define a method to open one or more files, each in its own tab
     def open_file(self):
-        # Get the file path using filedialog
-        file_path = filedialog.askopenfilename()
-        if file_path:
-            # Read the contents of the file and insert it into the textarea
-            with open(file_path, "r") as f:
-                content = f.read()
-                self.textarea.delete("1.0", tk.END)
-                self.textarea.insert(tk.END, content)
-            self.filename = file_path
-            # Update the window title to include the filename
-            self.master.title(self.filename + " - Notepad")
+        # Get the file paths using filedialog
+        file_paths = filedialog.askopenfilenames()
+        if file_paths:
+            # Background tabs stay on disk until they are selected
+            documents = [self.add_document(file_path) for file_path in file_paths]
+            self.switch_to(documents[-1])
+    
+    # Define a method to search every file under a folder
+    def find_in_folder(self):
+        folder = filedialog.askdirectory()
+        if not folder:
+            return
+        pattern = simpledialog.askstring("Find in Folder", "Search for:", parent=self.master)
+        if pattern:
+            SearchResults(self, FolderSearch(folder, pattern))
+
+    # Define a method to show a file in a tab with the cursor on the given line
+    def open_at(self, path, line):
+        path = os.path.abspath(path)
+        for document in self.documents:
+            if document.filename and os.path.abspath(document.filename) == path:
+                break
+        else:
+            document = self.add_document(path)
+        self.switch_to(document)
+        self.textarea.mark_set(tk.INSERT, "%d.0" % line)
+        self.textarea.see(tk.INSERT)
+        self.textarea.focus_set()
     
+    # Write the active document to `path`. Both ways write the buffer exactly, as
+    # UTF-8 and without the newline Tk keeps after the last line, so turning the
+    # piece table model on or off never changes the bytes of a saved file
+    def write_document(self, path):
+        if self.current.model is not None:
+            # Stream the pieces straight to disk instead of copying the whole buffer
+            self.current.model = self.current.model.save(path)
+        else:
+            with open(path, "wb") as f:
+                f.write(self.textarea.get("1.0", "end-1c").encode("utf-8", "surrogateescape"))
+
     # Define a method to save a file
     def save_file(self):
         if self.filename:
             # If a filename exists, write the contents of the textarea to the file
-            with open(self.filename, "w") as f:
-                f.write(self.textarea.get("1.0", tk.END))
+            self.write_document(self.filename)
+            self.journal.start(self.filename)
         else:
             # If no filename exists, prompt the user to save the file as
             self.save_file_as()
@@ -53,17 +1080,71 @@ class Notepad:
         file_path = filedialog.asksaveasfilename(defaultextension=".txt")
         if file_path:
             # Write the contents of the textarea to the new file
-            with open(file_path, "w") as f:
-                f.write(self.textarea.get("1.0", tk.END))
+            self.write_document(file_path)
             self.filename = file_path
+            self.journal.start(self.filename)
             # Update the window title to include the new filename
             self.master.title(self.filename + " - Notepad")
 
+    # Define a method to offer recovery of journals left behind by a crash
+    def recover_journals(self):
+        own = {document.journal.path for document in self.documents if document.journal}
+        # Journals are made lazily, so on a first launch the folder may not exist yet
+        os.makedirs(JOURNAL_DIR, exist_ok=True)
+        for name in sorted(os.listdir(JOURNAL_DIR)):
+            path = os.path.join(JOURNAL_DIR, name)
+            if not name.endswith(".journal") or path in own:
+                continue
+            records = read_journal(path)
+            if records is None:
+                os.remove(path)
+                continue
+            base = records[0]
+            # Another IdeaPad that is still running owns this journal
+            if base.get("pid") != os.getpid() and process_alive(base.get("pid")):
+                continue
+            label = base.get("file") or "Untitled"
+            prompt = "Recover unsaved changes to " + label + "?"
+            if base.get("file") and os.path.exists(base["file"]):
+                stat = os.stat(base["file"])
+                if (stat.st_mtime, stat.st_size) != (base.get("mtime"), base.get("size")):
+                    prompt += "\n\nThe file has changed on disk since, so the result may be wrong."
+            if messagebox.askyesno("Recover", prompt):
+                # Reuse the initial empty tab, otherwise recover into a new one
+                if self.filename or self.journal.has_changes():
+                    self.new_tab()
+                self.journal.paused = True
+                replay_journal(records, self.textarea)
+                self.journal.paused = False
+                self.highlighter.reset()
+                self.filename = base.get("file")
+                self.journal.start(self.filename)
+                self.journal.compact()
+                self.journal.dirty = True
+                self.master.title(label + " (recovered) - Notepad")
+            os.remove(path)
+
+    # Define a method to close the window without leaving stale journals
+    def close(self):
+        for document in list(self.documents):
+            if document.journal is not None and document.journal.has_changes():
+                self.switch_to(document)
+                if not self.confirm_discard():
+                    return
+        for document in self.documents:
+            if document.journal is not None:
+                document.journal.discard()
+            if document.model is not None:
+                document.model.close()
+            document.drop_spill()
+        self.master.destroy()
+
 # Create the Tkinter root window
 root = tk.Tk()
 
 # Create an instance of the Notepad class
 notepad = Notepad(root)
+notepad.recover_journals()
 
 # Start the Tkinter event loop
 root.mainloop()
\ No newline at end of file
@@ -1,8 +1,30 @@
+import os
+import sys
+
+# A headless run has no window to get OpenGL from, so it renders through EGL or
+# OSMesa instead. PyOpenGL only picks that up if it is set before its import.
+if '--headless' in sys.argv and 'PYOPENGL_PLATFORM' not in os.environ:
+    backend = 'auto'
+    for i, arg in enumerate(sys.argv):
+        if arg.startswith('--backend='):
+            backend = arg.split('=', 1)[1]
+        elif arg == '--backend' and i + 1 < len(sys.argv):
+            backend = sys.argv[i + 1]
+    if backend in ('auto', 'egl', 'osmesa'):
+        os.environ['PYOPENGL_PLATFORM'] = 'osmesa' if backend == 'osmesa' else 'egl'
+        # Lets Mesa's EGL run without an X or Wayland display
+        os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+
 import pygame
 from pygame.locals import *
 from OpenGL.GL import *
 from OpenGL.GLU import *
+import argparse
+import ctypes
 import random
+import numpy as np
+from mesh_loader import load_mesh
+from offscreen import FrameWriter, GLOffscreen, NumpyRasterizer, perspective, rotate, translate
 
 vertices = (
     (1, -1, -1),
@@ -41,6 +63,12 @@ colors = [
     (1, 0, 0.5)
 ]
 
+# Rotation speed of the cube in degrees per second and the fixed simulation step
+# (seconds): the animation runs at the same speed however fast frames are drawn
+ROTATION_SPEED = 90
+TIMESTEP = 1 / 120
+
+# Immediate mode: every vertex goes through a Python call on every frame
 def Cube():
     glBegin(GL_LINES)
     for edge in edges:
@@ -49,24 +77,214 @@ def Cube():
             glVertex3fv(vertices[vertex])
     glEnd()
 
+# Define a mesh kept in GPU buffers: positions and colours are uploaded once
+# into one interleaved vertex buffer and the indices into an index buffer, so
+# drawing it is a single glDrawElements call with no Python work per vertex
+class MeshBuffer:
+    def __init__(self, positions, colors, indices, mode=GL_LINES):
+        data = np.hstack((np.asarray(positions, dtype=np.float32),
+                          np.asarray(colors, dtype=np.float32)))
+        indices = np.ascontiguousarray(indices, dtype=np.uint32).ravel()
+        self.stride = data.strides[0]
+        self.count = len(indices)
+        self.mode = mode
+        self.vbo, self.ibo = glGenBuffers(2)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def draw(self):
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_FLOAT, self.stride, ctypes.c_void_p(0))
+        glColorPointer(3, GL_FLOAT, self.stride, ctypes.c_void_p(12))
+        glDrawElements(self.mode, self.count, GL_UNSIGNED_INT, ctypes.c_void_p(0))
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def delete(self):
+        glDeleteBuffers(2, [self.vbo, self.ibo])
+
+# Arrays for drawing a loaded mesh: centred and scaled to fit the view like
+# the cube does, and coloured by its normals since the scene has no lighting
+def mesh_arrays(path):
+    positions, normals, indices = load_mesh(path)
+    low, high = positions.min(axis=0), positions.max(axis=0)
+    positions = (positions - (low + high) / 2) * (2 / max(float((high - low).max()), 1e-9))
+    return positions, normals * 0.5 + 0.5, indices
+
+# Define an fps/frame-time readout drawn over the scene. The text is rendered
+# with pygame.font only twice a second and copied with glDrawPixels, so it
+# costs next to nothing per frame
+class Overlay:
+    def __init__(self):
+        self.font = pygame.font.SysFont('monospace', 16)
+        self.pixels = None
+        self.size = (0, 0)
+        self.elapsed = 0.0
+
+    def update(self, clock, dt, vsync):
+        self.elapsed += dt
+        if self.pixels is not None and self.elapsed < 0.5:
+            return
+        self.elapsed = 0.0
+        # get_rawtime is the time spent on the frame itself, without the fps cap wait
+        text = '%5.1f fps  frame %5.1f ms  work %5.1f ms  vsync %s' % (
+            clock.get_fps(), clock.get_time(), clock.get_rawtime(), 'on' if vsync else 'off')
+        surface = self.font.render(text, True, (255, 255, 255), (0, 0, 0))
+        self.size = surface.get_size()
+        self.pixels = pygame.image.tostring(surface, 'RGBA', True)
+
+    def draw(self, display):
+        if self.pixels is None:
+            return
+        glWindowPos2i(8, display[1] - 8 - self.size[1])
+        glDrawPixels(self.size[0], self.size[1], GL_RGBA, GL_UNSIGNED_BYTE, self.pixels)
+
+# Open the window, or reopen it to switch vsync. Reopening can replace the
+# OpenGL context, so the projection is set up again here
+def open_window(display, vsync):
+    try:
+        pygame.display.set_mode(display, DOUBLEBUF | OPENGL, vsync=int(vsync))
+    except pygame.error:
+        # The driver cannot sync to the display
+        pygame.display.set_mode(display, DOUBLEBUF | OPENGL)
+        vsync = False
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    gluPerspective(45, (display[0] / display[1]), 0.1, 50.0)
+    glMatrixMode(GL_MODELVIEW)
+    glEnable(GL_DEPTH_TEST)
+    return vsync
+
+# Render a turntable, one full turn about the vertical axis over all frames,
+# without a window and stream the frames to args.output
+def render_headless(args, model):
+    size = args.size
+    # The same view as the window: 45 degree lens, model 5 units away
+    view = perspective(45, size[0] / size[1], 0.1, 50.0) @ translate(0.0, 0.0, -5)
+    context = None
+    if args.backend != 'numpy':
+        try:
+            context = GLOffscreen(size, os.environ.get('PYOPENGL_PLATFORM'))
+        except Exception as error:
+            if args.backend != 'auto':
+                raise
+            print('No offscreen OpenGL (%s), using the NumPy rasterizer' % error)
+    if context is not None:
+        glEnable(GL_DEPTH_TEST)
+        buffer = MeshBuffer(*model)
+    else:
+        rasterizer = NumpyRasterizer(size)
+
+    writer = FrameWriter(args.output, size, args.fps or 30)
+    try:
+        for frame in range(args.frames):
+            matrix = view @ rotate(360 * frame / args.frames, (0, 1, 0))
+            if context is not None:
+                # The whole transform goes in the modelview matrix, projection stays identity
+                glLoadMatrixd(matrix.T)
+                glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                buffer.draw()
+                image = context.read()
+            else:
+                image = rasterizer.render(matrix, model[0], model[1], model[2], model[3] == GL_LINES)
+            writer.write(image)
+    finally:
+        writer.close()
+        if context is not None:
+            buffer.delete()
+            context.close()
+    print('Wrote %d frames to %s' % (writer.count, args.output))
+
+def frame_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
 def main():
+    parser = argparse.ArgumentParser(description='Spinning 3D cube')
+    parser.add_argument('--immediate', action='store_true',
+                        help='draw with glBegin/glEnd instead of vertex buffers')
+    parser.add_argument('--mesh', help='OBJ or PLY file to show instead of the cube')
+    parser.add_argument('--fps', type=int, default=0,
+                        help='frame rate cap (0 for no cap)')
+    parser.add_argument('--no-vsync', dest='vsync', action='store_false',
+                        help='do not wait for the display refresh (toggle with V)')
+    parser.add_argument('--no-overlay', dest='overlay', action='store_false',
+                        help='hide the fps/frame-time overlay (toggle with O)')
+    parser.add_argument('--headless', action='store_true',
+                        help='render a turntable to files instead of opening a window')
+    parser.add_argument('--backend', choices=('auto', 'egl', 'osmesa', 'numpy'), default='auto',
+                        help='headless renderer; auto tries EGL, then falls back to NumPy')
+    parser.add_argument('--frames', type=int, default=120, help='headless frames to render')
+    parser.add_argument('--size', type=frame_size, default=(800, 600), help='headless frame size, WxH')
+    parser.add_argument('--output', default='turntable_%04d.png',
+                        help='headless output: a numbered PNG pattern or an .mp4 file')
+    args = parser.parse_args()
+
+    if args.mesh:
+        model = mesh_arrays(args.mesh) + (GL_TRIANGLES,)
+    else:
+        model = (vertices, colors, edges, GL_LINES)
+    if args.headless:
+        render_headless(args, model)
+        return
+
     pygame.init()
     display = (800, 600)
-    pygame.display.set_mode(display, DOUBLEBUF | OPENGL)
-    gluPerspective(45, (display[0] / display[1]), 0.1, 50.0)
-    glTranslatef(0.0, 0.0, -5)
+    vsync = open_window(display, args.vsync)
+    # Buffers can only be made once the window has its OpenGL context
+    cube = None if args.immediate and not args.mesh else MeshBuffer(*model)
+    overlay = Overlay() if args.overlay else None
 
+    clock = pygame.time.Clock()
+    angle = previous = 0.0
+    lag = 0.0
     while True:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if cube is not None:
+                    cube.delete()
                 pygame.quit()
                 quit()
+            if event.type == KEYDOWN and event.key == K_v:
+                if cube is not None:
+                    cube.delete()
+                vsync = open_window(display, not vsync)
+                cube = None if args.immediate and not args.mesh else MeshBuffer(*model)
+            if event.type == KEYDOWN and event.key == K_o:
+                overlay = None if overlay else Overlay()
+
+        # Seconds since the last frame; tick also holds the frame rate to the cap
+        dt = clock.tick(args.fps) / 1000
+        # Advance the animation in fixed steps. A very long frame (the window
+        # being dragged, say) is cut short so there is no burst of catch-up steps
+        lag += min(dt, 0.25)
+        while lag >= TIMESTEP:
+            previous = angle
+            angle += ROTATION_SPEED * TIMESTEP
+            lag -= TIMESTEP
 
-        glRotatef(1, 3, 1, 1)
+        glLoadIdentity()
+        glTranslatef(0.0, 0.0, -5)
+        # Draw between the last two steps so the motion is smooth at any fps
+        glRotatef(previous + (angle - previous) * lag / TIMESTEP, 3, 1, 1)
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        Cube()
+        if cube is None:
+            Cube()
+        else:
+            cube.draw()
+        if overlay is not None:
+            overlay.update(clock, dt, vsync)
+            overlay.draw(display)
         pygame.display.flip()
-        pygame.time.wait(10)
 
 if __name__ == "__main__":
     main()
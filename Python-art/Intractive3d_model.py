@@ -1,19 +1,103 @@
+import argparse
 import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
 
-# Generate random data
-np.random.seed(42)
-n_points = 100
-x = np.random.rand(n_points)
-y = np.random.rand(n_points)
-z = np.random.rand(n_points)
+# Above this many points the plot switches to large-data mode: the points are
+# binned into voxels here in NumPy before plotting, so the HTML size and the
+# browser's work stay bounded however many points there are
+MAX_POINTS = 100000
 
-# Create a 3D scatter plot
-fig = px.scatter_3d(x=x, y=y, z=z)
+# Voxel id of every point on a resolution^3 grid; `unit` holds the points
+# scaled into the unit cube
+def voxel_ids(unit, resolution):
+    cells = np.minimum((unit * resolution).astype(np.int64), resolution - 1)
+    return (cells[:, 0] * resolution + cells[:, 1]) * resolution + cells[:, 2]
 
-# Customize the appearance and interactivity
-fig.update_traces(marker=dict(size=5, color='blue'), selector=dict(mode='markers'))
-fig.update_layout(scene=dict(aspectmode="cube"))
+def occupied(unit, resolution):
+    return len(np.unique(voxel_ids(unit, resolution)))
 
-# Show the interactive plot
-fig.show()
+# Finest grid whose occupied voxels still fit the budget. The level of detail
+# follows the density: sparse regions keep nearly every point while dense
+# regions collapse into one voxel each. The search runs on a sample, which can
+# only see fewer voxels than all the points, so the grid is then made coarser
+# until all the points fit.
+def choose_resolution(unit, budget, sample=250000, seed=0):
+    subset = unit
+    if len(unit) > sample:
+        subset = unit[np.random.default_rng(seed).choice(len(unit), sample, replace=False)]
+    low, high = 1, 1 << 16
+    while low < high:
+        middle = (low + high + 1) // 2
+        if occupied(subset, middle) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    while low > 1 and subset is not unit and occupied(unit, low) > budget:
+        low = max(1, int(low * 0.9))
+    return low
+
+# Reduce the points to one per occupied voxel: the voxel's centroid ('bin') or
+# one of its real points ('decimate'), and how many points each one stands for
+def reduce_points(points, budget, mode='bin', seed=0):
+    low, high = points.min(axis=0), points.max(axis=0)
+    unit = (points - low) / np.maximum(high - low, 1e-12)
+    ids = voxel_ids(unit, choose_resolution(unit, budget, seed=seed))
+    if mode == 'decimate':
+        # Shuffle first so the point kept in each voxel is a random one
+        order = np.random.default_rng(seed).permutation(len(points))
+        _, first, counts = np.unique(ids[order], return_index=True, return_counts=True)
+        return points[order[first]], counts
+    _, inverse, counts = np.unique(ids, return_inverse=True, return_counts=True)
+    centroids = np.stack([np.bincount(inverse, weights=points[:, axis]) for axis in range(3)], axis=1)
+    return centroids / counts[:, None], counts
+
+def large_figure(points, budget, mode):
+    reduced, counts = reduce_points(points, budget, mode)
+    # Contiguous float32 arrays: plotly 6 and newer write them into the HTML as
+    # base64 typed arrays, a third the size of a JSON list of numbers
+    x, y, z = (np.ascontiguousarray(reduced[:, axis], dtype=np.float32) for axis in range(3))
+    color = np.ascontiguousarray(np.log1p(counts), dtype=np.float32)
+    # Scatter3d already draws with WebGL; colour shows how many points each marker holds
+    return go.Figure(go.Scatter3d(
+        x=x, y=y, z=z,
+        mode='markers',
+        marker=dict(size=2, color=color, colorscale='Viridis',
+                    colorbar=dict(title='log(1 + points)')),
+        name='%d of %d points' % (len(reduced), len(points))))
+
+def main():
+    parser = argparse.ArgumentParser(description='Interactive 3D scatter plot')
+    parser.add_argument('--points', type=int, default=100, help='number of random points')
+    parser.add_argument('--max-points', type=int, default=MAX_POINTS,
+                        help='markers drawn at most; more points than this are binned')
+    parser.add_argument('--mode', choices=('bin', 'decimate'), default='bin',
+                        help='large-data mode: voxel centroids or one sampled point per voxel')
+    parser.add_argument('--output', help='write the plot to this HTML file instead of showing it')
+    args = parser.parse_args()
+
+    # Generate random data
+    np.random.seed(42)
+    n_points = args.points
+    x = np.random.rand(n_points)
+    y = np.random.rand(n_points)
+    z = np.random.rand(n_points)
+
+    if n_points > args.max_points:
+        fig = large_figure(np.stack((x, y, z), axis=1), args.max_points, args.mode)
+    else:
+        # Create a 3D scatter plot
+        fig = px.scatter_3d(x=x, y=y, z=z)
+
+        # Customize the appearance and interactivity
+        fig.update_traces(marker=dict(size=5, color='blue'), selector=dict(mode='markers'))
+    fig.update_layout(scene=dict(aspectmode="cube"))
+
+    # Show the interactive plot
+    if args.output:
+        fig.write_html(args.output, include_plotlyjs='cdn')
+    else:
+        fig.show()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import hashlib
+import os
+import re
+import numpy as np
+
+# Load OBJ and PLY meshes into NumPy arrays:
+#   vertices  (n, 3) float32 positions
+#   normals   (n, 3) float32 unit normals, one per vertex
+#   indices   (m, 3) uint32 triangle corners (polygons are fan-triangulated)
+# Parsing works on whole blocks of the file at once (regex to collect a kind of
+# line, np.fromstring / np.frombuffer to convert it), never line by line in
+# Python, so meshes with millions of triangles load in seconds. The result is
+# cached as an .npz file named after a hash of the mesh file, so loading the
+# same file again only reads the arrays back.
+
+# Bump when the parsers change so stale cache files are not used
+CACHE_VERSION = 1
+
+OBJ_VERTEX = re.compile(rb'^v[ \t]+(\S+[ \t]+\S+[ \t]+\S+)', re.M)
+OBJ_NORMAL = re.compile(rb'^vn[ \t]+(\S+[ \t]+\S+[ \t]+\S+)', re.M)
+OBJ_FACE = re.compile(rb'^f[ \t]+([^\r\n#]*)', re.M)
+# The /texture/normal part of a face corner such as 7/3/7 or 7//7
+OBJ_CORNER_TAIL = re.compile(rb'/\S*')
+
+PLY_TYPES = {
+    'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1',
+    'short': 'i2', 'int16': 'i2', 'ushort': 'u2', 'uint16': 'u2',
+    'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8',
+}
+
+def file_hash(path):
+    digest = hashlib.blake2b(str(CACHE_VERSION).encode(), digest_size=16)
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Triangles of polygons stored back to back in `flat`: polygon i has counts[i]
+# corners starting at starts[i]. Each polygon becomes a fan around its first corner.
+def fan_triangulate(flat, starts, counts):
+    counts = counts.astype(np.int64)
+    triangles = np.maximum(counts - 2, 0)
+    polygon = np.repeat(np.arange(len(counts)), triangles)
+    # Position of every triangle inside its polygon's fan: 0, 1, ..., counts-3
+    first = np.cumsum(triangles) - triangles
+    k = np.arange(len(polygon)) - first[polygon]
+    base = starts[polygon]
+    return np.stack((flat[base], flat[base + k + 1], flat[base + k + 2]), axis=1)
+
+# Area-weighted vertex normals, for meshes that do not come with their own
+def vertex_normals(vertices, indices):
+    corners = vertices[indices]
+    face = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    normals = np.zeros_like(vertices)
+    for corner in range(3):
+        np.add.at(normals, indices[:, corner], face)
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    return normals / np.where(length > 0, length, 1)
+
+def parse_obj(data):
+    vertices = np.fromstring(b' '.join(OBJ_VERTEX.findall(data)), sep=' ').reshape(-1, 3)
+    normals = np.fromstring(b' '.join(OBJ_NORMAL.findall(data)), sep=' ').reshape(-1, 3)
+    # Keep only the vertex number of each corner and end every face with a 0,
+    # which is never a valid OBJ index, so all faces parse in one call
+    faces = OBJ_CORNER_TAIL.sub(b'', b' 0 '.join(OBJ_FACE.findall(data)) + b' 0')
+    flat = np.fromstring(faces, dtype=np.int64, sep=' ')
+    ends = np.flatnonzero(flat == 0)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    # OBJ counts from 1; negative numbers count back from the end of the
+    # vertex list (files nearly always list every vertex before the faces)
+    flat = np.where(flat > 0, flat - 1, flat + len(vertices))
+    indices = fan_triangulate(flat, starts, ends - starts)
+    # Normals can be used as they are only if there is exactly one per vertex
+    if len(normals) != len(vertices):
+        normals = None
+    return vertices, normals, indices
+
+def read_ply_header(file):
+    if file.readline().strip() != b'ply':
+        raise ValueError('not a PLY file')
+    fmt, elements = None, []
+    while True:
+        line = file.readline()
+        if not line:
+            raise ValueError('PLY header has no end_header')
+        words = line.decode('ascii').split()
+        if not words or words[0] in ('comment', 'obj_info'):
+            continue
+        if words[0] == 'end_header':
+            return fmt, elements
+        if words[0] == 'format':
+            fmt = words[1]
+        elif words[0] == 'element':
+            elements.append((words[1], int(words[2]), []))
+        elif words[0] == 'property' and words[1] == 'list':
+            elements[-1][2].append((words[4], PLY_TYPES[words[2]], PLY_TYPES[words[3]]))
+        elif words[0] == 'property':
+            elements[-1][2].append((words[2], PLY_TYPES[words[1]], None))
+
+def parse_ply(path):
+    with open(path, 'rb') as file:
+        fmt, elements = read_ply_header(file)
+        body = file.read()
+    order = {'binary_little_endian': '<', 'binary_big_endian': '>'}.get(fmt)
+    if fmt != 'ascii' and order is None:
+        raise ValueError('unknown PLY format %r' % fmt)
+    tables = {}
+    if fmt == 'ascii':
+        lines = body.split(b'\n')
+        row = 0
+        for name, count, props in elements:
+            block = lines[row:row + count]
+            row += count
+            if all(list_type is None for _, _, list_type in props):
+                columns = [prop for prop, _, _ in props]
+                values = np.fromstring(b' '.join(block), sep=' ').reshape(count, len(columns))
+                tables[name] = {prop: values[:, i] for i, prop in enumerate(columns)}
+            else:
+                tables[name] = {'vertex_indices': ascii_ply_faces(block)}
+    else:
+        offset = 0
+        for name, count, props in elements:
+            table, offset = binary_ply_element(body, offset, count, props, order)
+            tables[name] = table
+
+    vertex = tables['vertex']
+    vertices = np.stack((vertex['x'], vertex['y'], vertex['z']), axis=1)
+    normals = None
+    if 'nx' in vertex:
+        normals = np.stack((vertex['nx'], vertex['ny'], vertex['nz']), axis=1)
+    face = tables.get('face', {})
+    lists = face.get('vertex_indices', face.get('vertex_index'))
+    if lists is None:
+        raise ValueError('PLY file has no faces')
+    return vertices, normals, lists
+
+# Faces of an ASCII PLY: each line is a corner count followed by the corners
+def ascii_ply_faces(block):
+    flat = np.fromstring(b' '.join(block), dtype=np.int64, sep=' ')
+    k = int(flat[0]) if len(flat) else 3
+    # The usual case: every face has the same number of corners
+    if len(flat) == len(block) * (k + 1) and (flat[::k + 1] == k).all():
+        return fan_triangulate(flat, np.arange(len(block)) * (k + 1) + 1, np.full(len(block), k))
+    starts, counts = np.empty(len(block), dtype=np.int64), np.empty(len(block), dtype=np.int64)
+    position = 0
+    for i in range(len(block)):
+        counts[i] = flat[position]
+        starts[i] = position + 1
+        position += counts[i] + 1
+    return fan_triangulate(flat, starts, counts)
+
+# One element of a binary PLY, starting at `offset` in body. Returns the columns
+# (faces become triangles) and the offset just after the element.
+def binary_ply_element(body, offset, count, props, order):
+    if count == 0:
+        return {prop: np.zeros((0, 3) if list_type else 0, dtype=np.int64) for prop, _, list_type in props}, offset
+    if all(list_type is None for _, _, list_type in props):
+        dtype = np.dtype([(prop, order + kind) for prop, kind, _ in props])
+        records = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+        return {prop: records[prop] for prop, _, _ in props}, offset + dtype.itemsize * count
+    # A face element: guess that every face has as many corners as the first,
+    # read all of them as fixed-size records and check the guess
+    fields = []
+    for prop, kind, list_type in props:
+        if list_type is None:
+            fields.append((prop, order + kind))
+        else:
+            k = int(np.frombuffer(body, dtype=order + kind, count=1, offset=offset + sum(
+                np.dtype(f[1]).itemsize for f in fields))[0])
+            fields.append((prop + '_count', order + kind))
+            fields.append((prop, order + list_type, (k,)))
+    dtype = np.dtype(fields)
+    if offset + dtype.itemsize * count <= len(body):
+        records = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+        counts = [name for name in dtype.names if name.endswith('_count')]
+        if all((records[name] == dtype[name[:-6]].shape[0]).all() for name in counts):
+            table = {}
+            for prop, _, list_type in props:
+                if list_type is None:
+                    table[prop] = records[prop]
+                else:
+                    lists = records[prop].astype(np.int64)
+                    k = lists.shape[1]
+                    table[prop] = fan_triangulate(lists.ravel(), np.arange(count) * k, np.full(count, k))
+            return table, offset + dtype.itemsize * count
+    # Mixed polygon sizes: walk the faces one by one
+    table = {prop: [] for prop, _, _ in props}
+    for _ in range(count):
+        for prop, kind, list_type in props:
+            value = np.frombuffer(body, dtype=order + kind, count=1, offset=offset)[0]
+            offset += np.dtype(kind).itemsize
+            if list_type is None:
+                table[prop].append(value)
+            else:
+                corners = np.frombuffer(body, dtype=order + list_type, count=int(value), offset=offset)
+                offset += np.dtype(list_type).itemsize * int(value)
+                table[prop].append(corners.astype(np.int64))
+    for prop, _, list_type in props:
+        if list_type is None:
+            table[prop] = np.array(table[prop])
+        else:
+            counts = np.array([len(corners) for corners in table[prop]])
+            flat = np.concatenate(table[prop]) if count else np.zeros(0, dtype=np.int64)
+            table[prop] = fan_triangulate(flat, np.cumsum(counts) - counts, counts)
+    return table, offset
+
+def parse_mesh(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.obj':
+        with open(path, 'rb') as file:
+            vertices, normals, indices = parse_obj(file.read())
+    elif extension == '.ply':
+        vertices, normals, indices = parse_ply(path)
+    else:
+        raise ValueError('unsupported mesh format %r (use .obj or .ply)' % extension)
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+    indices = np.ascontiguousarray(indices, dtype=np.uint32).reshape(-1, 3)
+    if len(indices) and indices.max() >= len(vertices):
+        raise ValueError('face refers to a vertex that does not exist')
+    if normals is None:
+        normals = vertex_normals(vertices, indices)
+    return vertices, np.ascontiguousarray(normals, dtype=np.float32), indices
+
+# Load a mesh, from the cache when this exact file was loaded before. The cache
+# lives in a .mesh_cache folder next to the mesh unless cache_dir is given.
+def load_mesh(path, cache_dir=None):
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), '.mesh_cache')
+    cache = os.path.join(cache_dir, file_hash(path) + '.npz')
+    if os.path.exists(cache):
+        with np.load(cache) as arrays:
+            return arrays['vertices'], arrays['normals'], arrays['indices']
+    vertices, normals, indices = parse_mesh(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write under a temporary name first so a crash never leaves half a cache file
+    temporary = cache + '.tmp.npz'
+    np.savez(temporary, vertices=vertices, normals=normals, indices=indices)
+    os.replace(temporary, cache)
+    return vertices, normals, indices
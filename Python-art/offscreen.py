@@ -0,0 +1,225 @@
+import math
+import os
+import shutil
+import subprocess
+import numpy as np
+
+# Headless rendering for 3D-model.py: an OpenGL context without a window
+# (EGL or OSMesa, both software-capable through Mesa), a pure-NumPy
+# rasterizer for machines with neither, and writers that stream frames to
+# numbered PNG files or to an MP4 through ffmpeg.
+
+# The same transforms as gluPerspective, glTranslatef and glRotatef, as NumPy
+# matrices, so the OpenGL and NumPy renderers draw exactly the same view
+def perspective(fovy, aspect, near, far):
+    f = 1 / math.tan(math.radians(fovy) / 2)
+    return np.array([
+        [f / aspect, 0, 0, 0],
+        [0, f, 0, 0],
+        [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)],
+        [0, 0, -1, 0],
+    ])
+
+def translate(x, y, z):
+    matrix = np.eye(4)
+    matrix[:3, 3] = (x, y, z)
+    return matrix
+
+def rotate(angle, axis):
+    x, y, z = np.asarray(axis, dtype=np.float64) / np.linalg.norm(axis)
+    c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    matrix = np.eye(4)
+    matrix[:3, :3] = [
+        [x * x * (1 - c) + c, x * y * (1 - c) - z * s, x * z * (1 - c) + y * s],
+        [y * x * (1 - c) + z * s, y * y * (1 - c) + c, y * z * (1 - c) - x * s],
+        [z * x * (1 - c) - y * s, z * y * (1 - c) + x * s, z * z * (1 - c) + c],
+    ]
+    return matrix
+
+# Define an OpenGL context that renders into an offscreen buffer of the given
+# size. platform is 'egl' or 'osmesa' and must match PYOPENGL_PLATFORM, which
+# has to be set before OpenGL is first imported.
+class GLOffscreen:
+    def __init__(self, size, platform):
+        self.size = size
+        if platform == 'egl':
+            self._egl(size)
+        elif platform == 'osmesa':
+            self._osmesa(size)
+        else:
+            raise ValueError('unknown offscreen platform %r' % platform)
+
+    def _egl(self, size):
+        import ctypes
+        from OpenGL import EGL
+        display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        if display == EGL.EGL_NO_DISPLAY or not EGL.eglInitialize(display, None, None):
+            raise RuntimeError('EGL is not available')
+        attributes = (EGL.EGLint * 13)(
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT, EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8,
+            EGL.EGL_BLUE_SIZE, 8, EGL.EGL_DEPTH_SIZE, 24, EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_NONE)
+        config, found = EGL.EGLConfig(), EGL.EGLint()
+        if not EGL.eglChooseConfig(display, attributes, ctypes.pointer(config), 1, ctypes.pointer(found)) \
+                or not found.value:
+            raise RuntimeError('EGL has no config for offscreen OpenGL')
+        surface = EGL.eglCreatePbufferSurface(display, config, (EGL.EGLint * 5)(
+            EGL.EGL_WIDTH, size[0], EGL.EGL_HEIGHT, size[1], EGL.EGL_NONE))
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+        if context == EGL.EGL_NO_CONTEXT or not EGL.eglMakeCurrent(display, surface, surface, context):
+            raise RuntimeError('could not make an EGL OpenGL context')
+        self.close = lambda: EGL.eglTerminate(display)
+
+    def _osmesa(self, size):
+        from OpenGL import GL, arrays, osmesa
+        context = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+        if not context:
+            raise RuntimeError('could not make an OSMesa context')
+        # OSMesa draws straight into this array, which must outlive the context
+        self.buffer = arrays.GLubyteArray.zeros((size[1], size[0], 4))
+        if not osmesa.OSMesaMakeCurrent(context, self.buffer, GL.GL_UNSIGNED_BYTE, size[0], size[1]):
+            raise RuntimeError('could not make the OSMesa context current')
+        self.close = lambda: osmesa.OSMesaDestroyContext(context)
+
+    # The finished frame as an (height, width, 3) uint8 array, top row first
+    def read(self):
+        from OpenGL import GL
+        GL.glFinish()
+        data = GL.glReadPixels(0, 0, self.size[0], self.size[1], GL.GL_RGB, GL.GL_UNSIGNED_BYTE)
+        return np.frombuffer(data, dtype=np.uint8).reshape(self.size[1], self.size[0], 3)[::-1]
+
+# Define a software renderer for lines and triangles with per-vertex colours and
+# a depth buffer, done with array operations instead of a loop per primitive
+class NumpyRasterizer:
+    # Most candidate pixels tested in one go, which bounds memory use
+    BATCH_PIXELS = 1 << 22
+
+    def __init__(self, size, background=(0, 0, 0)):
+        self.size = size
+        self.background = np.array(background, dtype=np.uint8)
+
+    def render(self, matrix, positions, colors, indices, lines):
+        width, height = self.size
+        positions = np.asarray(positions, dtype=np.float64)
+        colors = np.asarray(colors, dtype=np.float64)
+        indices = np.asarray(indices, dtype=np.int64)
+        clip = np.hstack((positions, np.ones((len(positions), 1)))) @ matrix.T
+        # Nothing is clipped against the near plane: primitives touching the
+        # space behind the camera are dropped whole
+        indices = indices[(clip[indices, 3] > 1e-6).all(axis=1)]
+        ndc = clip[:, :3] / np.where(clip[:, 3:] > 1e-6, clip[:, 3:], 1)
+        x = (ndc[:, 0] + 1) * width / 2
+        y = (1 - ndc[:, 1]) * height / 2
+        fragments = self._lines if lines else self._triangles
+        pixels, depth, color = fragments(x, y, ndc[:, 2], colors, indices)
+        image = np.empty((height * width, 3), dtype=np.uint8)
+        image[:] = self.background
+        keep = (depth >= -1) & (depth <= 1)
+        pixels, depth, color = pixels[keep], depth[keep], color[keep]
+        # Depth test: of all fragments on a pixel the nearest one wins
+        order = np.lexsort((depth, pixels))
+        pixels = pixels[order]
+        nearest = np.ones(len(pixels), dtype=bool)
+        nearest[1:] = pixels[1:] != pixels[:-1]
+        image[pixels[nearest]] = np.clip(color[order][nearest] * 255 + 0.5, 0, 255).astype(np.uint8)
+        return image.reshape(height, width, 3)
+
+    def _lines(self, x, y, z, colors, edges):
+        width, height = self.size
+        a, b = edges[:, 0], edges[:, 1]
+        # One sample per pixel along the longer axis of each line
+        steps = np.ceil(np.maximum(abs(x[b] - x[a]), abs(y[b] - y[a]))).astype(np.int64) + 1
+        line = np.repeat(np.arange(len(edges)), steps)
+        t = (np.arange(len(line)) - np.repeat(np.cumsum(steps) - steps, steps)) / np.maximum(steps[line] - 1, 1)
+        a, b, t = a[line], b[line], t[:, None]
+        px = np.floor(x[a] + (x[b] - x[a]) * t[:, 0]).astype(np.int64)
+        py = np.floor(y[a] + (y[b] - y[a]) * t[:, 0]).astype(np.int64)
+        inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+        depth = z[a] + (z[b] - z[a]) * t[:, 0]
+        color = colors[a] + (colors[b] - colors[a]) * t
+        return (py * width + px)[inside], depth[inside], color[inside]
+
+    def _triangles(self, x, y, z, colors, triangles):
+        width, height = self.size
+        px, py = x[triangles], y[triangles]
+        area = (px[:, 1] - px[:, 0]) * (py[:, 2] - py[:, 0]) - (px[:, 2] - px[:, 0]) * (py[:, 1] - py[:, 0])
+        left = np.clip(np.floor(px.min(axis=1)), 0, width).astype(np.int64)
+        right = np.clip(np.ceil(px.max(axis=1)), 0, width).astype(np.int64)
+        top = np.clip(np.floor(py.min(axis=1)), 0, height).astype(np.int64)
+        bottom = np.clip(np.ceil(py.max(axis=1)), 0, height).astype(np.int64)
+        extent = np.maximum(right - left, bottom - top)
+        visible = (abs(area) > 1e-12) & (right > left) & (bottom > top)
+
+        pixels, depths, colours = [], [], []
+        # Triangles are handled in groups of similar size: each group tests a
+        # size x size block of pixels at every triangle's corner in one broadcast
+        size, smaller = 1, 0
+        while smaller < max(width, height):
+            group = np.flatnonzero(visible & (extent > smaller) & (extent <= size))
+            offsets = np.arange(size * size)
+            gx, gy = offsets % size, offsets // size
+            for start in range(0, len(group), max(1, self.BATCH_PIXELS // (size * size))):
+                batch = group[start:start + max(1, self.BATCH_PIXELS // (size * size))]
+                bx, by = px[batch], py[batch]
+                sx = left[batch, None] + gx[None]
+                sy = top[batch, None] + gy[None]
+                cx, cy = sx + 0.5, sy + 0.5
+                # Barycentric weights of every pixel centre
+                w0 = ((bx[:, 1, None] - cx) * (by[:, 2, None] - cy) - (bx[:, 2, None] - cx) * (by[:, 1, None] - cy))
+                w1 = ((bx[:, 2, None] - cx) * (by[:, 0, None] - cy) - (bx[:, 0, None] - cx) * (by[:, 2, None] - cy))
+                w0, w1 = w0 / area[batch, None], w1 / area[batch, None]
+                w2 = 1 - w0 - w1
+                inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0) & (sx < right[batch, None]) & (sy < bottom[batch, None])
+                row, cell = np.nonzero(inside)
+                corners = triangles[batch[row]]
+                weights = np.stack((w0[row, cell], w1[row, cell], w2[row, cell]), axis=1)
+                pixels.append(sy[row, cell] * width + sx[row, cell])
+                depths.append((z[corners] * weights).sum(axis=1))
+                colours.append((colors[corners] * weights[:, :, None]).sum(axis=1))
+            smaller, size = size, size * 2
+        if not pixels:
+            return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros((0, 3))
+        return np.concatenate(pixels), np.concatenate(depths), np.concatenate(colours)
+
+# Write each frame as soon as it is rendered: to numbered PNG files when the
+# path has a %d-style pattern (turntable_%04d.png), or through an ffmpeg pipe
+# when it ends in .mp4, so no frames pile up in memory
+class FrameWriter:
+    def __init__(self, path, size, fps):
+        self.path = path
+        self.size = size
+        self.count = 0
+        self.encoder = None
+        if path.lower().endswith('.mp4'):
+            if shutil.which('ffmpeg') is None:
+                raise RuntimeError('writing MP4 needs ffmpeg on the PATH')
+            # yuv420p, which players expect, needs an even width and height
+            if size[0] % 2 or size[1] % 2:
+                raise ValueError('MP4 frames need an even width and height')
+            self.encoder = subprocess.Popen(
+                ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                 '-s', '%dx%d' % size, '-r', str(fps), '-i', '-',
+                 '-c:v', 'libx264', '-pix_fmt', 'yuv420p', path],
+                stdin=subprocess.PIPE)
+        else:
+            if '%' not in path:
+                raise ValueError('PNG output needs a frame number pattern such as frame_%04d.png')
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+
+    def write(self, frame):
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if self.encoder is not None:
+            self.encoder.stdin.write(frame.tobytes())
+        else:
+            import pygame
+            pygame.image.save(pygame.image.frombuffer(frame.tobytes(), self.size, 'RGB'), self.path % self.count)
+        self.count += 1
+
+    def close(self):
+        if self.encoder is not None:
+            self.encoder.stdin.close()
+            if self.encoder.wait():
+                raise RuntimeError('ffmpeg failed to encode %s' % self.path)
@@ -0,0 +1,95 @@
+import logging
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("http_client")
+
+# Status codes that are worth trying again
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Raised instead of making a request while the circuit breaker is open
+class CircuitOpenError(requests.RequestException):
+    pass
+
+# Define a shared HTTP client: one keep-alive Session with a connection pool,
+# connect/read timeouts, bounded retries with jittered exponential backoff
+# and a circuit breaker that fails fast while a server keeps erroring
+class HttpClient:
+    def __init__(self, connect_timeout=3.05, read_timeout=10, retries=3, backoff=0.5, max_backoff=8,
+                 failure_threshold=5, reset_after=30, pool_size=10):
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.failures = 0
+        self.opened_at = None
+        self.last_latency = None
+        self.lock = threading.Lock()
+
+    # Seconds to wait before the next attempt: "full jitter" exponential backoff,
+    # unless the server asked for a specific delay with Retry-After
+    def _delay(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _check_circuit(self, url):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_after:
+                raise CircuitOpenError("circuit open for " + url)
+            # Half-open: let this request through as a probe
+            self.opened_at = None
+            self.failures = self.failure_threshold - 1
+
+    def _record(self, ok):
+        with self.lock:
+            if ok:
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                logger.warning("circuit opened after %d failures", self.failures)
+
+    def request(self, method, url, **kwargs):
+        self._check_circuit(url)
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.retries + 1):
+            response = None
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            else:
+                self.last_latency = time.perf_counter() - start
+                logger.info("%s %s -> %d in %.0f ms", method, url, response.status_code, self.last_latency * 1000)
+                if response.status_code not in RETRY_STATUSES:
+                    self._record(True)
+                    return response
+                error = requests.HTTPError("%d from %s" % (response.status_code, url), response=response)
+            if attempt < self.retries:
+                time.sleep(self._delay(attempt, response))
+        self._record(False)
+        raise error
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import os
+import random
+import threading
+
+# Joke settings and the offline joke cache, shared by the jokes_generator
+# window and the headless joke_harvester; nothing here needs Tk or requests
+
+# The joke endpoint can be pointed at a local stand-in server, either with the
+# JOKE_API_URL environment variable or as the first command line argument
+JOKE_API_URL = os.environ.get("JOKE_API_URL", "https://icanhazdadjoke.com/")
+
+# Every joke ever fetched is kept here and served when the network is unavailable
+JOKE_CACHE_PATH = os.environ.get("JOKE_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".dad_jokes.jsonl"))
+
+# Define a function to hash a joke so reworded whitespace or case does not count as new
+def joke_hash(joke):
+    return hashlib.sha1(" ".join(joke.lower().split()).encode("utf-8")).hexdigest()
+
+# Define an append-only JSONL cache of jokes with an in-memory hash -> offset
+# index; warming only keeps the offsets, never the jokes themselves
+class JokeCache:
+    def __init__(self, path=JOKE_CACHE_PATH):
+        self.path = path
+        self.index = {}
+        self.offsets = []
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            self._warm()
+
+    def _warm(self):
+        with open(self.path, "rb") as f:
+            offset = 0
+            line = b"\n"
+            for line in f:
+                try:
+                    digest = json.loads(line)["hash"]
+                except (ValueError, KeyError, TypeError):
+                    # A corrupt line is skipped; the jokes after it are still good
+                    digest = None
+                if digest is not None and digest not in self.index:
+                    self.index[digest] = offset
+                    self.offsets.append(offset)
+                offset += len(line)
+        # A last line without its newline was torn by a crash; cut it off so
+        # the next joke is not appended onto it
+        if not line.endswith(b"\n"):
+            with open(self.path, "r+b") as f:
+                f.truncate(offset - len(line))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    # Append a joke unless it is already cached; returns True if it was new
+    def add(self, joke):
+        digest = joke_hash(joke)
+        with self.lock:
+            if digest in self.index:
+                return False
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                f.write(json.dumps({"hash": digest, "joke": joke}).encode("utf-8") + b"\n")
+            self.index[digest] = offset
+            self.offsets.append(offset)
+            return True
+
+    # Read one random cached joke straight from its offset
+    def random_joke(self):
+        with self.lock:
+            if not self.offsets:
+                return None
+            offset = random.choice(self.offsets)
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                return json.loads(f.readline())["joke"]
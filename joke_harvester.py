@@ -0,0 +1,141 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+from joke_cache import JOKE_API_URL, joke_hash
+
+# Headless bulk joke collector: fetches jokes concurrently, backs off on
+# 429 / Retry-After, drops duplicates and streams the rest to a JSONL file in
+# the same format as the JokeCache, so the output can seed the offline cache.
+#
+#   python joke_harvester.py -n 500 -o jokes.jsonl
+#   python joke_harvester.py -n 100 --mock     (against a local mock server)
+
+# Define a function to read the hashes already in an output file, so reruns append only new jokes
+def load_seen(path):
+    seen = set()
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    seen.add(json.loads(line)["hash"])
+                except (ValueError, KeyError, TypeError):
+                    # Skip a corrupt line, like the JokeCache does
+                    continue
+    return seen
+
+# Define the harvester; returns a dict of counters
+async def harvest(url, count, output, concurrency=10, max_requests=None):
+    max_requests = max_requests or count * 5
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.BoundedSemaphore(concurrency)
+    seen = load_seen(output)
+    stats = {"written": 0, "duplicates": 0, "rate_limited": 0, "errors": 0, "requests": 0}
+    pause_until = 0.0
+
+    async with httpx.AsyncClient(headers={"Accept": "text/plain"}, timeout=10) as client:
+        with open(output, "a", encoding="utf-8") as out:
+            async def worker():
+                nonlocal pause_until
+                while stats["written"] < count and stats["requests"] < max_requests:
+                    async with semaphore:
+                        # Everyone waits out a Retry-After, not just the request that got it
+                        delay = pause_until - loop.time()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                        if stats["written"] >= count:
+                            return
+                        stats["requests"] += 1
+                        try:
+                            response = await client.get(url)
+                        except httpx.HTTPError:
+                            stats["errors"] += 1
+                            await asyncio.sleep(random.uniform(0.5, 1.5))
+                            continue
+                    if response.status_code == 429:
+                        stats["rate_limited"] += 1
+                        retry_after = response.headers.get("Retry-After", "1")
+                        wait = float(retry_after) if retry_after.replace(".", "", 1).isdigit() else 1.0
+                        pause_until = max(pause_until, loop.time() + wait)
+                        continue
+                    if response.status_code != 200:
+                        stats["errors"] += 1
+                        continue
+                    joke = response.text.strip()
+                    digest = joke_hash(joke)
+                    if digest in seen:
+                        stats["duplicates"] += 1
+                        continue
+                    if stats["written"] >= count:
+                        return
+                    seen.add(digest)
+                    out.write(json.dumps({"hash": digest, "joke": joke}) + "\n")
+                    out.flush()
+                    stats["written"] += 1
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return stats
+
+# A tiny local stand-in for icanhazdadjoke.com that rate limits every few requests
+class MockJokeHandler(BaseHTTPRequestHandler):
+    jokes = ["Mock joke number %d: why did the test pass? It was well mocked." % i for i in range(200)]
+    rate_limit_every = 10
+    requests_seen = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            MockJokeHandler.requests_seen += 1
+            limited = MockJokeHandler.requests_seen % self.rate_limit_every == 0
+        if limited:
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.end_headers()
+            return
+        body = random.choice(self.jokes).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+# Define a function to start the mock server on a free port; returns (server, url)
+def start_mock_server(port=0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockJokeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, "http://127.0.0.1:%d/" % server.server_port
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch many dad jokes concurrently into a JSONL file.")
+    parser.add_argument("-n", "--count", type=int, default=100, help="number of new jokes to collect")
+    parser.add_argument("-c", "--concurrency", type=int, default=10, help="maximum requests in flight")
+    parser.add_argument("-o", "--output", default="jokes.jsonl", help="JSONL file to append to")
+    parser.add_argument("--max-requests", type=int, help="give up after this many requests (default 5 x count)")
+    parser.add_argument("--url", default=JOKE_API_URL, help="joke endpoint")
+    parser.add_argument("--mock", action="store_true", help="run against a local mock server")
+    args = parser.parse_args()
+
+    url = args.url
+    server = None
+    if args.mock:
+        server, url = start_mock_server()
+
+    start = time.perf_counter()
+    stats = asyncio.run(harvest(url, args.count, args.output, args.concurrency, args.max_requests))
+    elapsed = time.perf_counter() - start
+    if server:
+        server.shutdown()
+    print("%d new jokes in %.1fs (%.1f/s), %d duplicates, %d rate limited, %d errors, %d requests"
+          % (stats["written"], elapsed, stats["written"] / elapsed, stats["duplicates"],
+             stats["rate_limited"], stats["errors"], stats["requests"]))
+
+if __name__ == "__main__":
+    main()
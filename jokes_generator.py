@@ -1,24 +1,116 @@
+import logging
+import queue
+import sys
+import threading
+import time
 import tkinter as tk
 import requests
+from http_client import HttpClient
+from joke_cache import JOKE_API_URL, JokeCache
 
-# Define a function to generate a random dad joke
+# Number of jokes to keep fetched ahead of time
+PREFETCH_SIZE = 5
+
+# Shared keep-alive client, so only the first request pays for DNS, TCP and TLS
+client = HttpClient()
+
+# Define a function to fetch one random dad joke
+def fetch_joke(url=JOKE_API_URL):
+    response = client.get(url, headers={"Accept": "text/plain"})
+    response.raise_for_status()
+    return response.text
+
+# Define a background worker that keeps a small queue of jokes filled,
+# falling back to the cache while the server is unreachable or rate limiting
+class JokeFetcher:
+    def __init__(self, url=JOKE_API_URL, size=PREFETCH_SIZE, retry_delay=2, cache=None):
+        self.url = url
+        self.retry_delay = retry_delay
+        self.cache = cache
+        self.jokes = queue.Queue(maxsize=size)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    # The next joke and its fetch latency without waiting: a prefetched joke if
+    # there is one, otherwise a cached joke right away (latency None), or None
+    def next_joke(self):
+        try:
+            return self.jokes.get_nowait()
+        except queue.Empty:
+            pass
+        cached = self.cache.random_joke() if self.cache is not None else None
+        return None if cached is None else (cached, None)
+
+    def _run(self):
+        while True:
+            try:
+                joke = fetch_joke(self.url)
+            except requests.RequestException as e:
+                self.error = e
+                cached = self.cache.random_joke() if self.cache is not None else None
+                if cached is None:
+                    time.sleep(self.retry_delay)
+                    continue
+                # A latency of None marks a joke served from the offline cache
+                self.jokes.put((cached, None))
+                continue
+            self.error = None
+            if self.cache is not None:
+                self.cache.add(joke)
+            # Blocks while the queue is full, so only PREFETCH_SIZE jokes are ever waiting
+            self.jokes.put((joke, client.last_latency))
+
+# Set while a check for the next joke is already scheduled
+waiting = False
+
+# Define a function to show the next random dad joke
 def generate_joke():
-    response = requests.get("https://icanhazdadjoke.com/", headers={"Accept": "text/plain"})
-    joke_text = response.text
+    global waiting
+    joke = fetcher.next_joke()
+    if joke is None:
+        # Nothing prefetched or cached yet; check again shortly instead of blocking the window
+        joke_label.config(text="Could not reach the joke server, retrying..." if fetcher.error else "Fetching a joke...")
+        if not waiting:
+            waiting = True
+            root.after(100, retry_joke)
+        return
+    joke_text, latency = joke
     joke_label.config(text=joke_text)
+    if latency is None:
+        status_label.config(text="Offline - from cache" if fetcher.error else "From cache")
+    else:
+        status_label.config(text="Fetched in %.0f ms" % (latency * 1000))
+
+def retry_joke():
+    global waiting
+    waiting = False
+    generate_joke()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    # Start prefetching before the window is even shown
+    fetcher = JokeFetcher(sys.argv[1] if len(sys.argv) > 1 else JOKE_API_URL, cache=JokeCache())
+    fetcher.start()
+
+    # Create the main window
+    root = tk.Tk()
+    root.title("Dad Joke Generator")
 
-# Create the main window
-root = tk.Tk()
-root.title("Dad Joke Generator")
+    # Create a label to display the dad joke
+    joke_label = tk.Label(root, text="")
+    joke_label.pack()
 
-# Create a label to display the dad joke
-joke_label = tk.Label(root, text="")
-joke_label.pack()
+    # Create a button to generate a new dad joke
+    joke_button = tk.Button(root, text="Generate Joke", command=generate_joke)
+    joke_button.pack()
 
-# Create a button to generate a new dad joke
-joke_button = tk.Button(root, text="Generate Joke", command=generate_joke)
-joke_button.pack()
+    # Create a label to show how long the request took
+    status_label = tk.Label(root, text="", fg="gray")
+    status_label.pack()
 
-# Run the main loop to start the application
-root.mainloop()
- 
\ No newline at end of file
+    # Run the main loop to start the application
+    root.mainloop()
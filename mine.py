@@ -1,25 +1,125 @@
 from ursina import *
 from ursina.prefabs.first_person_controller import FirstPersonController
+from math import floor
+import atexit
+import queue
+import numpy as np
+from mine_world import *
 app = Ursina()
 player = FirstPersonController()
 Sky()
 
-boxes = []
-for i in range(20):
-  for j in range(20):
-    box = Button(color=color.white, model='cube', position=(j,0,i),
-          texture='grass.png', parent=scene, origin_y=0.5)
-    boxes.append(box)
+world = VoxelWorld(RegionStore(WORLD_DIR))
+terrain = TerrainGenerator()
+streamer = ChunkStreamer(world.store, terrain)
+chunk_entities = {}
+# One texture shared by every chunk, so all chunks render with the same state
+atlas_texture = Texture(build_atlas())
+atlas_texture.filtering = None
+
+# Block placed by the left mouse button, chosen with the number keys
+selected_block = GRASS
+
+# Rebuild the single mesh of a chunk after its blocks changed
+def rebuild_chunk(key):
+  lod = chunk_lod(key, player_chunk())
+  geometry = build_chunk_geometry(world.padded(key), lod) if key in world.chunks else None
+  entity = chunk_entities.get(key)
+  if geometry is None:
+    if entity is not None:
+      destroy(chunk_entities.pop(key))
+    return
+  vertices, triangles, uvs, normals = geometry
+  mesh = Mesh(vertices=vertices.tolist(), triangles=triangles.tolist(), uvs=uvs.tolist(),
+              normals=normals.tolist(), static=True)
+  if entity is None:
+    entity = chunk_entities[key] = Entity(parent=scene, texture=atlas_texture,
+                                          position=(key[0] * CHUNK - GRID_OFFSET[0], key[1] * CHUNK - GRID_OFFSET[1],
+                                                    key[2] * CHUNK - GRID_OFFSET[2]))
+  entity.model = mesh
+  entity.lod = lod
+  # Far chunks can never be walked on before they switch back to full detail
+  entity.collider = 'mesh' if lod == 1 else None
+
+# Hide chunks outside the view frustum or render distance; the chunks right
+# around the player always stay enabled because the player stands on them
+def cull_chunks(center):
+  if not chunk_entities:
+    return
+  keys = list(chunk_entities)
+  hfov, vfov = camera.perspective_lens.get_fov()
+  visible = chunks_in_view(np.array(keys), tuple(camera.world_position), tuple(camera.forward),
+                           tuple(camera.right), tuple(camera.up), hfov, vfov, RENDER_DISTANCE)
+  for key, show in zip(keys, visible.tolist()):
+    if max(abs(key[i] - center[i]) for i in range(3)) <= 1:
+      show = True
+    entity = chunk_entities[key]
+    if entity.enabled != show:
+      entity.enabled = show
+
+def player_cell():
+  position = player.world_position
+  return tuple(floor(position[i] + GRID_OFFSET[i]) for i in range(3))
+
+def player_chunk():
+  return VoxelWorld._split(player_cell())[0]
+
+# Ask for the chunks around the player and unload the ones that fell out of range
+def stream_around(center):
+  streamer.request(center)
+  for key in list(world.chunks) + list(world.air):
+    if not in_range(key, center):
+      world.unload(key)
+  streamer.forget_outside(center)
+  # Chunks that crossed LOD_DISTANCE get rebuilt at their new detail level
+  for key, entity in chunk_entities.items():
+    if entity.lod != chunk_lod(key, center):
+      world.dirty.add(key)
+
+def update():
+  center = player_chunk()
+  if center != update.center:
+    update.center = center
+    stream_around(center)
+  for _ in range(CHUNKS_PER_FRAME):
+    try:
+      key, blocks = streamer.ready.get_nowait()
+    except queue.Empty:
+      break
+    world.add_chunk(key, blocks)
+  # Only the chunks touched since the last frame are rebuilt
+  for _ in range(min(REBUILDS_PER_FRAME, len(world.dirty))):
+    rebuild_chunk(world.dirty.pop())
+  cull_chunks(center)
+  update.since_save += time.dt
+  if update.since_save >= SAVE_INTERVAL:
+    update.since_save = 0
+    world.save()
+update.center = None
+update.since_save = 0
+
+atexit.register(world.save)
 
 def input(key):
-  for box in boxes:
-    if box.hovered:
-      if key == 'left mouse down':
-        new = Button(color=color.white, model='cube', position=box.position + mouse.normal,
-                    texture='grass.png', parent=scene, origin_y=0.5)
-        boxes.append(new)
-      if key == 'right mouse down':
-        boxes.remove(box)
-        destroy(box)
-
-app.run()
\ No newline at end of file
+  global selected_block
+  if key.isdigit() and int(key) in BLOCK_TYPES:
+    selected_block = int(key)
+    return
+  if key not in ('left mouse down', 'right mouse down'):
+    return
+  # Pick along the crosshair ray instead of checking every block's hovered flag
+  if key == 'left mouse down':
+    place_block(world, camera.world_position, camera.forward, selected_block)
+  if key == 'right mouse down':
+    remove_block(world, camera.world_position, camera.forward)
+
+# Spawn above the terrain and build the ground under the player before the
+# first frame so they do not fall through
+player.y = int(terrain.heightmap(0, 0)[0, 0]) + 2
+for key in ChunkStreamer.keys_around(player_chunk(), radius=1, height=1):
+  streamer.requested.add(key)
+  world.add_chunk(key, streamer.load(key))
+while world.dirty:
+  rebuild_chunk(world.dirty.pop())
+
+app.run()
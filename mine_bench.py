@@ -0,0 +1,135 @@
+# Headless benchmark of the mine.py world logic: no Ursina, GPU or window needed.
+# Scripts thousands of place/remove/pick operations and chunk rebuilds on a
+# generated world and reports ops/sec and rebuild latency. With --baseline the
+# run fails when a rate drops or a latency rises too far past a saved result,
+# so CI can catch performance regressions.
+#
+#   python mine_bench.py --ops 5000 --output bench.json
+#   python mine_bench.py --baseline bench.json --tolerance 0.3
+#
+# CI compares against mine_bench_baseline.json; after a deliberate change in
+# performance, regenerate it with --ops 2000 --output mine_bench_baseline.json
+import argparse
+import json
+import sys
+import tempfile
+import time
+import numpy as np
+from mine_world import (CHUNK, GRASS, REACH, ChunkStreamer, RegionStore, TerrainGenerator, VoxelWorld,
+                        build_chunk_geometry, chunk_lod, place_block, raycast_blocks, remove_block)
+
+# Run fn once per item and return the rate in items per second
+def rate(fn, items):
+  start = time.perf_counter()
+  for item in items:
+    fn(item)
+  return len(items) / max(time.perf_counter() - start, 1e-9)
+
+# Milliseconds taken by one call of fn(item) for every item
+def latencies(fn, items):
+  times = []
+  for item in items:
+    start = time.perf_counter()
+    fn(item)
+    times.append((time.perf_counter() - start) * 1000)
+  return np.array(times)
+
+def summary(times):
+  return {'mean_ms': float(times.mean()), 'p50_ms': float(np.percentile(times, 50)),
+          'p95_ms': float(np.percentile(times, 95)), 'max_ms': float(times.max())}
+
+# Random crosshair rays: from just above the surface near the spawn, looking
+# down at the ground at various angles, like a player digging and building
+def random_rays(terrain, count, spread, rng):
+  rays = []
+  for _ in range(count):
+    x, z = rng.integers(-spread, spread, size=2)
+    cx, lx = divmod(int(x), CHUNK)
+    cz, lz = divmod(int(z), CHUNK)
+    origin = (x + rng.random() - 0.5, terrain.heightmap(cx, cz)[lx, lz] + 2.5, z + rng.random() - 0.5)
+    direction = np.array((rng.normal(), -abs(rng.normal()) - 0.5, rng.normal()))
+    rays.append((origin, tuple(direction / np.linalg.norm(direction))))
+  return rays
+
+def run(ops, radius, seed):
+  rng = np.random.default_rng(seed)
+  terrain = TerrainGenerator(seed=seed)
+  world = VoxelWorld()
+  results = {'ops': ops, 'radius': radius, 'seed': seed}
+
+  keys = ChunkStreamer.keys_around((0, 0, 0), radius=radius, height=1) + \
+      ChunkStreamer.keys_around((0, -1, 0), radius=radius, height=1)
+  keys = list(dict.fromkeys(keys))
+  results['generate_chunks_per_sec'] = rate(lambda key: world.add_chunk(key, terrain.generate(key)), keys)
+
+  # Full-detail and far-LOD meshes of every loaded chunk
+  loaded = list(world.chunks)
+  results['rebuild'] = summary(latencies(lambda key: build_chunk_geometry(world.padded(key)), loaded))
+  results['rebuild_lod'] = summary(latencies(lambda key: build_chunk_geometry(world.padded(key), 2), loaded))
+  world.dirty.clear()
+
+  spread = max(radius - 1, 1) * CHUNK
+  rays = random_rays(terrain, ops, spread, rng)
+  results['raycasts_per_sec'] = rate(lambda ray: raycast_blocks(ray[0], ray[1], world.is_solid, REACH), rays)
+  results['places_per_sec'] = rate(lambda ray: place_block(world, ray[0], ray[1], GRASS), rays)
+  results['removes_per_sec'] = rate(lambda ray: remove_block(world, ray[0], ray[1]), rays)
+
+  # Rebuilding what the edits touched, as mine.py does a few chunks per frame
+  dirty = list(world.dirty)
+  results['edit_rebuild'] = summary(latencies(lambda key: build_chunk_geometry(world.padded(key),
+                                                                               chunk_lod(key, (0, 0, 0))), dirty))
+  world.dirty.clear()
+
+  # Saving every edited chunk to region files and loading them back
+  with tempfile.TemporaryDirectory() as path:
+    world.store = RegionStore(path)
+    edited = list(world.unsaved)
+    start = time.perf_counter()
+    world.save()
+    results['save_chunks_per_sec'] = len(edited) / max(time.perf_counter() - start, 1e-9)
+    results['load_chunks_per_sec'] = rate(world.store.load, edited)
+    world.store.close()
+  return results
+
+# Rates that fell more than `tolerance` below the baseline, and mean latencies
+# that rose by the same slowdown (tolerance 0.5 allows everything to be 2x slower)
+def regressions(results, baseline, tolerance):
+  failed = []
+  for name, value in baseline.items():
+    if name not in results:
+      continue
+    if name.endswith('_per_sec') and results[name] < value * (1 - tolerance):
+      failed.append('%s: %.0f/s, baseline %.0f/s' % (name, results[name], value))
+    if isinstance(value, dict) and results[name]['mean_ms'] > value['mean_ms'] / (1 - tolerance):
+      failed.append('%s: %.3f ms, baseline %.3f ms' % (name, results[name]['mean_ms'], value['mean_ms']))
+  return failed
+
+def main():
+  parser = argparse.ArgumentParser(description='Headless benchmark of the mine.py world logic')
+  parser.add_argument('--ops', type=int, default=5000, help='place/remove/raycast operations of each kind')
+  parser.add_argument('--radius', type=int, default=3, help='radius in chunks of the generated world')
+  parser.add_argument('--seed', type=int, default=1337)
+  parser.add_argument('--output', help='write the results to this JSON file')
+  parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+  parser.add_argument('--tolerance', type=float, default=0.3, help='allowed slowdown against the baseline')
+  args = parser.parse_args()
+
+  results = run(args.ops, args.radius, args.seed)
+  for name, value in results.items():
+    if isinstance(value, dict):
+      print('%-24s ' % name + '  '.join('%s %.3f' % item for item in value.items()))
+    elif name.endswith('_per_sec'):
+      print('%-24s %.0f' % (name, value))
+  if args.output:
+    with open(args.output, 'w') as file:
+      json.dump(results, file, indent=2)
+  if args.baseline:
+    with open(args.baseline) as file:
+      failed = regressions(results, json.load(file), args.tolerance)
+    for line in failed:
+      print('regression', line)
+    if failed:
+      sys.exit(1)
+
+if __name__ == '__main__':
+  main()
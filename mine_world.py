@@ -0,0 +1,530 @@
+# World logic of mine.py: chunk storage, saving, terrain, streaming, meshing
+# and picking. Nothing here needs Ursina or a window, so it also runs headless
+# (see mine_bench.py).
+from functools import lru_cache
+from math import floor
+import os
+import queue
+import threading
+import zlib
+import numpy as np
+
+# How far away (in blocks) the player can place or break blocks
+REACH = 8
+
+# Edge length of a chunk; each chunk is drawn as one combined mesh
+CHUNK = 16
+
+# Most chunk meshes rebuilt per frame, so big edits never stall a frame
+REBUILDS_PER_FRAME = 4
+
+# Where the world is saved and how often changed chunks are written (seconds)
+WORLD_DIR = 'world'
+SAVE_INTERVAL = 10
+
+# Seed of the procedural terrain
+WORLD_SEED = 1337
+
+# Chunks kept in memory around the player: horizontal radius and chunks above/below.
+# Anything further away is unloaded, so memory depends on these and not on the world size.
+VIEW_DISTANCE = 6
+VIEW_HEIGHT = 2
+
+# Most streamed chunks added to the world per frame
+CHUNKS_PER_FRAME = 8
+
+# Chunks further than RENDER_DISTANCE blocks or outside the camera frustum are
+# not drawn; beyond LOD_DISTANCE chunks a half-resolution mesh is used
+RENDER_DISTANCE = VIEW_DISTANCE * CHUNK
+LOD_DISTANCE = 3
+
+# A block at (x, y, z) is a unit cube spanning x-0.5..x+0.5, y-1..y, z-0.5..z+0.5
+# (the old cube model with origin_y=0.5), i.e. the grid cell floor(p + GRID_OFFSET).
+GRID_OFFSET = (0.5, 1, 0.5)
+
+# The six faces of a unit cell: outward normal and the four corners; the
+# triangles below wind them counter-clockwise as seen from outside
+FACES = [
+  ((1, 0, 0), ((1, 0, 0), (1, 1, 0), (1, 1, 1), (1, 0, 1))),
+  ((-1, 0, 0), ((0, 0, 1), (0, 1, 1), (0, 1, 0), (0, 0, 0))),
+  ((0, 1, 0), ((0, 1, 0), (0, 1, 1), (1, 1, 1), (1, 1, 0))),
+  ((0, -1, 0), ((0, 0, 1), (0, 0, 0), (1, 0, 0), (1, 0, 1))),
+  ((0, 0, 1), ((1, 0, 1), (1, 1, 1), (0, 1, 1), (0, 0, 1))),
+  ((0, 0, -1), ((0, 0, 0), (0, 1, 0), (1, 1, 0), (1, 0, 0))),
+]
+FACE_UVS = np.array(((0, 0), (0, 1), (1, 1), (1, 0)), dtype=np.float32)
+
+# All block textures are packed into one atlas of ATLAS_COLUMNS x ATLAS_COLUMNS
+# tiles, so every chunk is drawn with the same single texture. A tile is either
+# an image file, found next to this script, or an RGB colour that gets a
+# little noise.
+ATLAS_TILE = 64
+ATLAS_COLUMNS = 4
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+TILES = ['grass.png', (134, 96, 67), (125, 125, 125), (219, 207, 163)]
+
+# Block ids: name and the tiles of its (top, side, bottom) faces. New block
+# types only need a line here (and maybe a tile); they add no draw calls.
+BLOCK_TYPES = {
+  1: ('grass', 0, 0, 1),
+  2: ('dirt', 1, 1, 1),
+  3: ('stone', 2, 2, 2),
+  4: ('sand', 3, 3, 3),
+}
+GRASS, DIRT, STONE, SAND = 1, 2, 3, 4
+
+# Atlas tile of every (block id, face) in FACES order: +x, -x, +y, -y, +z, -z
+FACE_TILES = np.zeros((256, 6), dtype=np.int32)
+for block, (name, top, side, bottom) in BLOCK_TYPES.items():
+  FACE_TILES[block] = (side, side, top, bottom, side, side)
+
+# Blocks are stored per chunk as a CHUNK^3 uint8 array of block ids (0 is air)
+# in a dict keyed by chunk coordinates, so lookups and edits stay O(1)
+class VoxelWorld:
+  def __init__(self, store=None):
+    self.chunks = {}
+    # Chunks whose mesh needs rebuilding, and chunks not yet written to the store
+    self.dirty = set()
+    self.unsaved = set()
+    # Chunks that were streamed in as all air, and chunks that only exist
+    # because a block was placed in them before their streamed data arrived
+    self.air = set()
+    self.pending = set()
+    self.store = store
+
+  def get(self, cell):
+    key, local = self._split(cell)
+    blocks = self.chunks.get(key)
+    return int(blocks[local]) if blocks is not None else 0
+
+  def is_solid(self, cell):
+    return self.get(cell) != 0
+
+  def set(self, cell, block):
+    key, local = self._split(cell)
+    blocks = self.chunks.get(key)
+    if blocks is None:
+      if block == 0:
+        return
+      blocks = self.chunks[key] = np.zeros((CHUNK,) * 3, dtype=np.uint8)
+      if key not in self.air:
+        self.pending.add(key)
+    blocks[local] = block
+    self.dirty.add(key)
+    self.unsaved.add(key)
+    # A block on a chunk border also changes which faces the neighbour shows
+    for axis in range(3):
+      if local[axis] in (0, CHUNK - 1):
+        neighbor = list(key)
+        neighbor[axis] += 1 if local[axis] else -1
+        if tuple(neighbor) in self.chunks:
+          self.dirty.add(tuple(neighbor))
+
+  # Put a chunk that was streamed in (blocks may be None for empty air)
+  def add_chunk(self, key, blocks):
+    if key in self.pending:
+      # Blocks placed before the chunk arrived go on top of the streamed ones
+      self.pending.discard(key)
+      placed = self.chunks[key]
+      blocks = placed if blocks is None else np.where(placed != 0, placed, blocks)
+    elif key in self.chunks:
+      return
+    elif blocks is None:
+      self.air.add(key)
+      return
+    self.chunks[key] = blocks
+    self.dirty.add(key)
+    # Neighbours can now hide the faces they share with this chunk
+    for axis in range(3):
+      for d in (-1, 1):
+        neighbor = list(key)
+        neighbor[axis] += d
+        if tuple(neighbor) in self.chunks:
+          self.dirty.add(tuple(neighbor))
+
+  # Drop a chunk from memory, saving it first if it was edited. A pending chunk
+  # is dropped unsaved: writing it would replace the stored chunk with little
+  # more than air.
+  def unload(self, key):
+    self.air.discard(key)
+    if key in self.pending:
+      self.pending.discard(key)
+      self.unsaved.discard(key)
+    if key in self.unsaved and self.store is not None:
+      self.store.save({key: self.chunks[key]})
+      self.unsaved.discard(key)
+    if self.chunks.pop(key, None) is not None:
+      self.dirty.add(key)
+
+  # Write only the chunks changed since the last save
+  def save(self):
+    if self.store is None or not self.unsaved:
+      return
+    # Pending chunks wait until their streamed data has been merged in
+    self.store.save({key: self.chunks[key] for key in self.unsaved - self.pending if key in self.chunks})
+    self.unsaved &= self.pending
+
+  @staticmethod
+  def _split(cell):
+    key, local = zip(*(divmod(c, CHUNK) for c in cell))
+    return key, local
+
+  # The chunk's blocks with a one-block border taken from its neighbours
+  def padded(self, key):
+    padded = np.zeros((CHUNK + 2,) * 3, dtype=np.uint8)
+    for dx in (-1, 0, 1):
+      for dy in (-1, 0, 1):
+        for dz in (-1, 0, 1):
+          blocks = self.chunks.get((key[0] + dx, key[1] + dy, key[2] + dz))
+          if blocks is None:
+            continue
+          src = tuple(slice(CHUNK - 1, CHUNK) if d < 0 else slice(0, 1) if d > 0 else slice(0, CHUNK)
+                      for d in (dx, dy, dz))
+          dst = tuple(slice(0, 1) if d < 0 else slice(CHUNK + 1, CHUNK + 2) if d > 0 else slice(1, CHUNK + 1)
+                      for d in (dx, dy, dz))
+          padded[dst] = blocks[src]
+    return padded
+
+# Chunks are saved in region files holding REGION^3 chunks each. A region file
+# starts with a fixed header and an offset table of (offset, length) per chunk;
+# chunk data is zlib-compressed block ids appended at the end of the file, so a
+# save only writes the chunks that changed plus their table entries.
+REGION = 8
+REGION_MAGIC = b'MINR'
+REGION_ENTRY = np.dtype([('offset', '<u8'), ('length', '<u4')])
+REGION_HEADER = 8 + REGION ** 3 * REGION_ENTRY.itemsize
+BLOCK_DTYPES = {1: np.uint8, 2: np.uint16}
+
+class RegionStore:
+  def __init__(self, directory, dtype=np.uint8):
+    self.directory = directory
+    self.dtype = np.dtype(dtype)
+    self.code = {np.dtype(t): c for c, t in BLOCK_DTYPES.items()}[self.dtype]
+    self.regions = {}
+    # Chunks are loaded on the streaming thread and saved on the main thread
+    self.lock = threading.RLock()
+    os.makedirs(directory, exist_ok=True)
+
+  @staticmethod
+  def _locate(key):
+    region, local = zip(*(divmod(c, REGION) for c in key))
+    return region, local[0] + REGION * (local[1] + REGION * local[2])
+
+  def _region(self, region, create=False):
+    if region in self.regions:
+      return self.regions[region]
+    path = os.path.join(self.directory, 'r.%d.%d.%d.region' % region)
+    if not os.path.exists(path):
+      if not create:
+        return None
+      with open(path, 'wb') as f:
+        f.write(REGION_MAGIC + bytes((self.code,)) + bytes(3) + bytes(REGION_HEADER - 8))
+    f = open(path, 'r+b')
+    header = f.read(REGION_HEADER)
+    if header[:4] != REGION_MAGIC:
+      raise ValueError('not a region file: ' + path)
+    table = np.frombuffer(header, dtype=REGION_ENTRY, offset=8).copy()
+    self.regions[region] = entry = (f, table, BLOCK_DTYPES[header[4]])
+    return entry
+
+  # Read one chunk, or None if it was never saved
+  def load(self, key):
+    with self.lock:
+      return self._load(key)
+
+  def _load(self, key):
+    region, index = self._locate(key)
+    entry = self._region(region)
+    if entry is None:
+      return None
+    f, table, dtype = entry
+    offset, length = table[index]
+    if not length:
+      return None
+    f.seek(int(offset))
+    blocks = np.frombuffer(zlib.decompress(f.read(int(length))), dtype=dtype)
+    return blocks.reshape((CHUNK,) * 3).astype(self.dtype)
+
+  # Write the given {chunk key: blocks} dict; chunks that are all air are dropped
+  def save(self, chunks):
+    with self.lock:
+      self._save(chunks)
+
+  def _save(self, chunks):
+    by_region = {}
+    for key, blocks in chunks.items():
+      region, index = self._locate(key)
+      by_region.setdefault(region, []).append((index, blocks))
+    for region, entries in by_region.items():
+      f, table, dtype = self._region(region, create=True)
+      f.seek(0, os.SEEK_END)
+      for index, blocks in entries:
+        if not blocks.any():
+          table[index] = (0, 0)
+          continue
+        data = zlib.compress(blocks.astype(dtype).tobytes(), 6)
+        table[index] = (f.tell(), len(data))
+        f.write(data)
+      f.seek(8)
+      f.write(table.tobytes())
+      f.flush()
+      # Rewritten chunks leave dead space behind; compact once it dominates the file
+      if f.seek(0, os.SEEK_END) > 2 * (REGION_HEADER + int(table['length'].sum())) + 65536:
+        self._compact(region)
+
+  def _compact(self, region):
+    f, table, dtype = self.regions.pop(region)
+    path = f.name
+    chunks = []
+    for index in np.nonzero(table['length'])[0]:
+      f.seek(int(table[index]['offset']))
+      chunks.append((index, f.read(int(table[index]['length']))))
+    f.close()
+    table = np.zeros_like(table)
+    with open(path + '.tmp', 'wb') as out:
+      out.write(REGION_MAGIC + bytes((self.code,)) + bytes(3) + bytes(REGION_HEADER - 8))
+      for index, data in chunks:
+        table[index] = (out.tell(), len(data))
+        out.write(data)
+      out.seek(8)
+      out.write(table.tobytes())
+    os.replace(path + '.tmp', path)
+
+  def close(self):
+    for f, table, dtype in self.regions.values():
+      f.close()
+    self.regions.clear()
+
+# Define a seeded terrain generator built on vectorized value noise: each
+# chunk is one set of array operations over its 16x16 column, and heightmaps
+# are cached per column since all chunks stacked in a column share one
+class TerrainGenerator:
+  def __init__(self, seed=WORLD_SEED, scale=48.0, octaves=4, amplitude=12.0):
+    self.seed = seed
+    self.scale = scale
+    self.octaves = octaves
+    self.amplitude = amplitude
+    self.heightmap = lru_cache(maxsize=1024)(self._heightmap)
+
+  # Pseudo-random value in [0, 1) for every integer lattice point
+  def _lattice(self, ix, iz, octave):
+    h = (ix.astype(np.uint64) * np.uint64(0x9E3779B1) ^ iz.astype(np.uint64) * np.uint64(0x85EBCA77)
+         ^ np.uint64((self.seed * 0xC2B2AE3D + octave * 0x27D4EB2F) & 0xFFFFFFFF))
+    h = (h ^ (h >> np.uint64(15))) * np.uint64(0x2C1B3C6D) & np.uint64(0xFFFFFFFF)
+    h = (h ^ (h >> np.uint64(12))) * np.uint64(0x297A2D39) & np.uint64(0xFFFFFFFF)
+    return (h ^ (h >> np.uint64(15))).astype(np.float64) / 2.0 ** 32
+
+  def _value_noise(self, x, z, octave):
+    ix, iz = np.floor(x).astype(np.int64), np.floor(z).astype(np.int64)
+    fx, fz = x - ix, z - iz
+    # Smoothstep so the surface has no creases along lattice lines
+    sx, sz = fx * fx * (3 - 2 * fx), fz * fz * (3 - 2 * fz)
+    top = self._lattice(ix, iz, octave) * (1 - sx) + self._lattice(ix + 1, iz, octave) * sx
+    bottom = self._lattice(ix, iz + 1, octave) * (1 - sx) + self._lattice(ix + 1, iz + 1, octave) * sx
+    return top * (1 - sz) + bottom * sz
+
+  # Surface height of every (x, z) column in a chunk column
+  def _heightmap(self, cx, cz):
+    x, z = np.meshgrid(np.arange(CHUNK) + cx * CHUNK, np.arange(CHUNK) + cz * CHUNK, indexing='ij')
+    height = np.zeros((CHUNK, CHUNK))
+    frequency, weight = 1.0 / self.scale, 1.0
+    for octave in range(self.octaves):
+      height += (self._value_noise(x * frequency, z * frequency, octave) - 0.5) * weight
+      frequency, weight = frequency * 2, weight * 0.5
+    height = np.round(height * self.amplitude).astype(np.int32)
+    height.flags.writeable = False
+    return height
+
+  # Block ids of one chunk: grass (sand in low spots) on the surface, a few
+  # blocks of dirt below it and stone underneath, air above
+  def generate(self, key):
+    ys = np.arange(CHUNK) + key[1] * CHUNK
+    height = self.heightmap(key[0], key[2])[:, None, :]
+    depth = height - ys[None, :, None]
+    if not (depth >= 0).any():
+      return None
+    top = np.where(height <= -6, SAND, GRASS)
+    blocks = np.select([depth < 0, depth == 0, depth <= 3], [0, top, DIRT], STONE)
+    return blocks.astype(np.uint8)
+
+# Whether a chunk is close enough to `center` to stay in memory; one chunk of
+# slack past the streamed area keeps chunks on the border from thrashing
+def in_range(key, center):
+  dx, dy, dz = key[0] - center[0], key[1] - center[1], key[2] - center[2]
+  return dx * dx + dz * dz <= (VIEW_DISTANCE + 1) ** 2 and abs(dy) <= VIEW_HEIGHT + 1
+
+# Define a background thread that brings chunks around the player into memory,
+# nearest first: saved chunks come from the store, the rest are generated.
+# Finished chunks are handed to the main thread through a queue.
+class ChunkStreamer:
+  def __init__(self, store, terrain):
+    self.store = store
+    self.terrain = terrain
+    self.ready = queue.Queue()
+    self.wanted = []
+    self.requested = set()
+    self.lock = threading.Lock()
+    self.wake = threading.Event()
+    threading.Thread(target=self._run, daemon=True).start()
+
+  # Keys that should be in memory around a chunk, nearest first
+  @staticmethod
+  def keys_around(center, radius=VIEW_DISTANCE, height=VIEW_HEIGHT):
+    keys = [(center[0] + dx, center[1] + dy, center[2] + dz)
+            for dx in range(-radius, radius + 1) for dy in range(-height, height + 1)
+            for dz in range(-radius, radius + 1) if dx * dx + dz * dz <= radius * radius]
+    return sorted(keys, key=lambda k: (k[0] - center[0]) ** 2 + (k[1] - center[1]) ** 2 + (k[2] - center[2]) ** 2)
+
+  def request(self, center):
+    with self.lock:
+      self.wanted = [key for key in self.keys_around(center) if key not in self.requested]
+    self.wake.set()
+
+  # Forget every requested chunk out of range of `center`, including all-air
+  # chunks that never reached the world, so `requested` stays bounded by the
+  # view distance instead of growing with the area explored
+  def forget_outside(self, center):
+    with self.lock:
+      self.requested = {key for key in self.requested if in_range(key, center)}
+
+  def load(self, key):
+    blocks = self.store.load(key)
+    return blocks if blocks is not None else self.terrain.generate(key)
+
+  def _run(self):
+    while True:
+      self.wake.wait()
+      with self.lock:
+        if not self.wanted:
+          self.wake.clear()
+          continue
+        key = self.wanted.pop(0)
+        if key in self.requested:
+          continue
+        self.requested.add(key)
+      self.ready.put((key, self.load(key)))
+
+# Build the geometry of one chunk with hidden faces culled: a face is only
+# emitted where a solid cell touches air. `padded` holds the chunk's cells with
+# a one-cell border from its neighbours; with lod=2 every 2x2x2 group of blocks
+# becomes one cell twice the size. Returns NumPy arrays
+# (vertices, triangles, uvs, normals) in chunk-local coordinates.
+def build_chunk_geometry(padded, lod=1):
+  if lod > 1:
+    # Widen the border to lod cells, then keep a cell if any block in its group is solid
+    padded = np.pad(padded, lod - 1, mode='edge')
+    n = padded.shape[0] // lod
+    padded = padded.reshape(n, lod, n, lod, n, lod).max(axis=(1, 3, 5))
+  size = padded.shape[0] - 2
+  solid = padded > 0
+  inner = solid[1:-1, 1:-1, 1:-1]
+  ids = padded[1:-1, 1:-1, 1:-1]
+  vertices, uvs, normals = [], [], []
+  for face, (normal, corners) in enumerate(FACES):
+    dx, dy, dz = normal
+    neighbor = solid[1 + dx:size + 1 + dx, 1 + dy:size + 1 + dy, 1 + dz:size + 1 + dz]
+    cells = np.argwhere(inner & ~neighbor)
+    if not len(cells):
+      continue
+    vertices.append((cells[:, None, :] + np.array(corners)[None]).reshape(-1, 3))
+    tiles = FACE_TILES[ids[tuple(cells.T)], face]
+    uvs.append(atlas_uvs(tiles).reshape(-1, 2))
+    normals.append(np.tile(np.array(normal, dtype=np.float32), (len(cells) * 4, 1)))
+  if not vertices:
+    return None
+  vertices = np.concatenate(vertices).astype(np.float32) * lod
+  quads = np.arange(0, len(vertices), 4, dtype=np.int32)[:, None]
+  triangles = (quads + np.array((0, 2, 1, 0, 3, 2), dtype=np.int32)).reshape(-1)
+  return vertices, triangles, np.concatenate(uvs), np.concatenate(normals)
+
+# UVs of the four corners of each face, given the atlas tile of each face;
+# the corners are pulled in by half a texel so neighbouring tiles never bleed in
+def atlas_uvs(tiles):
+  inset = 0.5 / ATLAS_TILE
+  corners = FACE_UVS * (1 - 2 * inset) + inset
+  column = (tiles % ATLAS_COLUMNS)[:, None]
+  row = (tiles // ATLAS_COLUMNS)[:, None]
+  u = (column + corners[None, :, 0]) / ATLAS_COLUMNS
+  # Image rows count from the top, texture v from the bottom
+  v = 1 - (row + 1 - corners[None, :, 1]) / ATLAS_COLUMNS
+  return np.stack((u, v), axis=-1).astype(np.float32)
+
+# Pack the block tiles into one atlas image
+def build_atlas():
+  from PIL import Image
+  size = ATLAS_TILE * ATLAS_COLUMNS
+  atlas = Image.new('RGB', (size, size))
+  noise = np.random.default_rng(WORLD_SEED)
+  for index, tile in enumerate(TILES):
+    if isinstance(tile, str):
+      image = Image.open(os.path.join(ASSET_DIR, tile)).convert('RGB').resize((ATLAS_TILE, ATLAS_TILE))
+    else:
+      pixels = np.array(tile, dtype=np.float32) * noise.uniform(0.85, 1.15, (ATLAS_TILE, ATLAS_TILE, 1))
+      image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    atlas.paste(image, ((index % ATLAS_COLUMNS) * ATLAS_TILE, (index // ATLAS_COLUMNS) * ATLAS_TILE))
+  return atlas
+
+# Level of detail for a chunk seen from the chunk the player is in
+def chunk_lod(key, center):
+  return 2 if (key[0] - center[0]) ** 2 + (key[2] - center[2]) ** 2 > LOD_DISTANCE ** 2 else 1
+
+# Define a function that tests many chunks against the camera at once: a chunk's
+# bounding sphere must be within `far` and inside all four side planes of the
+# view frustum. `keys` is an (n, 3) array of chunk keys; returns a bool mask.
+def chunks_in_view(keys, position, forward, right, up, hfov, vfov, far):
+  centers = keys * CHUNK + CHUNK / 2 - np.array(GRID_OFFSET)
+  offsets = centers - np.array(position)
+  radius = CHUNK * 3 ** 0.5 / 2
+  z = offsets @ np.array(forward)
+  x = np.abs(offsets @ np.array(right))
+  y = np.abs(offsets @ np.array(up))
+  tan_h, tan_v = np.tan(np.radians(hfov / 2)), np.tan(np.radians(vfov / 2))
+  return ((z > -radius) & (np.linalg.norm(offsets, axis=1) < far + radius)
+          & (x - z * tan_h <= radius * np.sqrt(1 + tan_h ** 2))
+          & (y - z * tan_v <= radius * np.sqrt(1 + tan_v ** 2)))
+
+# Walk the grid cells along a ray (Amanatides & Woo DDA) and return the first
+# solid cell and the normal of the face that was entered, or None
+def raycast_blocks(origin, direction, is_solid, max_distance=REACH):
+  origin = [origin[i] + GRID_OFFSET[i] for i in range(3)]
+  cell = [floor(c) for c in origin]
+  step, t_max, t_delta = [0] * 3, [float('inf')] * 3, [float('inf')] * 3
+  for i in range(3):
+    if direction[i] > 0:
+      step[i] = 1
+      t_max[i] = (cell[i] + 1 - origin[i]) / direction[i]
+      t_delta[i] = 1 / direction[i]
+    elif direction[i] < 0:
+      step[i] = -1
+      t_max[i] = (origin[i] - cell[i]) / -direction[i]
+      t_delta[i] = 1 / -direction[i]
+  normal = (0, 0, 0)
+  t = 0
+  while t <= max_distance:
+    if is_solid(tuple(cell)):
+      return tuple(cell), normal
+    axis = t_max.index(min(t_max))
+    t = t_max[axis]
+    cell[axis] += step[axis]
+    t_max[axis] += t_delta[axis]
+    normal = tuple(-step[axis] if i == axis else 0 for i in range(3))
+  return None
+
+# Clicking with the crosshair: place a block in the empty cell in front of the
+# face that was hit, or remove the block that was hit. Both return the changed
+# cell, or None if nothing is in reach.
+def place_block(world, origin, direction, block):
+  hit = raycast_blocks(origin, direction, world.is_solid)
+  if hit is None:
+    return None
+  position, normal = hit
+  cell = tuple(position[i] + normal[i] for i in range(3))
+  world.set(cell, block)
+  return cell
+
+def remove_block(world, origin, direction):
+  hit = raycast_blocks(origin, direction, world.is_solid)
+  if hit is None:
+    return None
+  world.set(hit[0], 0)
+  return hit[0]